@@ -36,7 +36,7 @@ print(f"home: https://outpost.run/{ENTITY}/inference-endpoints/{endpt.name}/over
 
 
 # wait for endpoint to start.
+endpt.wait_until_ready(on_state_change=print)
 
-# if endpt.get().status == "healthy":
-#     predictor = endpt.create_predictor()
-#     predictor.infer(json={"sentences": "hello."})
+predictor = endpt.create_predictor()
+print(predictor.infer(json={"sentences": "hello."}).json())
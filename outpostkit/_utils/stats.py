@@ -0,0 +1,85 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Tuple
+
+
+class RollingWindow:
+    """
+    Thread-safe window of the most recent samples, used for latency percentiles.
+    Samples older than `max_age` seconds are dropped as well.
+    """
+
+    def __init__(self, size: int = 1000, max_age: Optional[float] = None) -> None:
+        self.size = size
+        self.max_age = max_age
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, value: float) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), value))
+
+    def values(self) -> List[float]:
+        with self._lock:
+            if self.max_age is not None:
+                cutoff = time.monotonic() - self.max_age
+                while self._samples and self._samples[0][0] < cutoff:
+                    self._samples.popleft()
+            return [value for _, value in self._samples]
+
+    def __len__(self) -> int:
+        return len(self.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Nearest-rank quantile of the window, `None` when it is empty."""
+        return self.percentiles(q)[0]
+
+    def percentiles(self, *qs: float) -> List[Optional[float]]:
+        """Nearest-rank quantiles (0 < q <= 1) of the window."""
+        return percentiles(self.values(), *qs)
+
+
+def percentiles(values: Iterable[float], *qs: float) -> List[Optional[float]]:
+    """Nearest-rank quantiles (0 < q <= 1) of `values`, `None` when it is empty."""
+    ordered = sorted(values)
+    if not ordered:
+        return [None for _ in qs]
+    return [
+        ordered[min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)]
+        for q in qs
+    ]
+
+
+class RatioBudget:
+    """
+    A token budget allowing extra work (retries, hedges) as a fraction of traffic.
+
+    Every request deposits `ratio` tokens up to `max_tokens`; every extra attempt
+    withdraws one. With ratio=0.1, at most ~10% extra requests are sent over time,
+    plus a burst of `max_tokens`.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10) -> None:
+        if ratio < 0:
+            raise ValueError(f"ratio should not be negative, actual {ratio}")
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
@@ -0,0 +1,138 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Sequence
+
+from outpostkit.exceptions import OutpostError
+
+BalancingStrategy = Literal["least_outstanding", "p2c"]
+
+
+@dataclass
+class BalancerTarget:
+    url: str
+    outstanding: int = 0
+    """Number of requests currently in flight to the target."""
+
+    consecutive_failures: int = 0
+
+    ejections: int = 0
+    """Number of consecutive times the target was ejected."""
+
+    ejected_until: float = 0
+    """`time.monotonic()` until which the target receives no traffic."""
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+
+
+class LoadBalancer:
+    """
+    Client-side load balancer spreading requests over several base URLs.
+
+    Targets are picked by least outstanding requests, or by the power of two random
+    choices (`p2c`). A target is ejected after `max_failures` consecutive failures for
+    `ejection_time` seconds, doubled on every consecutive ejection up to
+    `max_ejection_time`. Once its ejection expires it gets traffic again; the first
+    failure ejects it right away. When every target is ejected, all of them are used.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        urls: Sequence[str],
+        strategy: BalancingStrategy = "least_outstanding",
+        *,
+        max_failures: int = 3,
+        ejection_time: float = 10,
+        max_ejection_time: float = 300,
+    ) -> None:
+        if not urls:
+            raise OutpostError("No targets to balance between.")
+        if strategy not in ("least_outstanding", "p2c"):
+            raise ValueError(f"Unknown balancing strategy: {strategy}")
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.targets: List[BalancerTarget] = [
+            BalancerTarget(url=url.rstrip("/")) for url in dict.fromkeys(urls)
+        ]
+        self._lock = threading.Lock()
+
+    def acquire(self) -> BalancerTarget:
+        """Pick a target and count a request in flight to it."""
+        with self._lock:
+            candidates = [t for t in self.targets if not t.ejected] or self.targets
+            if self.strategy == "p2c" and len(candidates) > 2:
+                first, second = random.sample(candidates, 2)  # noqa: S311
+                target = first if first.outstanding <= second.outstanding else second
+            else:
+                fewest = min(t.outstanding for t in candidates)
+                target = random.choice(  # noqa: S311
+                    [t for t in candidates if t.outstanding == fewest]
+                )
+            target.outstanding += 1
+            return target
+
+    def release(self, target: BalancerTarget, *, success: Optional[bool]) -> None:
+        """
+        Count a request to the target as finished. `success` is `None` when the
+        outcome says nothing of the target, eg. the request was cancelled.
+        """
+        with self._lock:
+            target.outstanding = max(target.outstanding - 1, 0)
+            if success is not None:
+                self._record(target, success=success)
+
+    def mark(self, url: str, *, healthy: bool) -> None:
+        """Record the result of an out-of-band healthcheck of a target."""
+        with self._lock:
+            for target in self.targets:
+                if target.url == url.rstrip("/"):
+                    if healthy:
+                        # readmit it; `ejections` is kept so that it is on probation.
+                        target.ejected_until = 0
+                        target.consecutive_failures = 0
+                    else:
+                        self._eject(target)
+
+    def _record(self, target: BalancerTarget, *, success: bool) -> None:
+        if success:
+            target.consecutive_failures = 0
+            if not target.ejected:
+                target.ejections = 0
+            return
+        if target.ejected:
+            # failures of requests sent before the ejection.
+            return
+        target.consecutive_failures += 1
+        # targets back from an ejection are ejected again on their first failure.
+        if target.ejections or target.consecutive_failures >= self.max_failures:
+            self._eject(target)
+
+    def _eject(self, target: BalancerTarget) -> None:
+        duration = min(
+            self.ejection_time * (2**target.ejections), self.max_ejection_time
+        )
+        target.ejections += 1
+        target.consecutive_failures = 0
+        target.ejected_until = time.monotonic() + duration
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Current state of the targets, keyed by url."""
+        with self._lock:
+            return {
+                t.url: {
+                    "outstanding": t.outstanding,
+                    "ejected": t.ejected,
+                    "ejections": t.ejections,
+                }
+                for t in self.targets
+            }
+
+
+def target_failed(status_code: int) -> bool:
+    """Whether a response status means the target itself is in trouble."""
+    return status_code in (502, 503, 504)
@@ -1,15 +1,31 @@
 from abc import abstractmethod
-from typing import Dict, List
+from typing import Any, Dict, List, Union
+
+from outpostkit.tensor_codec import TENSOR_CONTENT_TYPE, decode_tensors, encode_tensors
 
 
 class EndpointHandler:
     python_requirements: List[str] = []
     system_dependencies: List[str] = []
     exception_handlers: Dict = {}
+    # ASGI middleware classes added to the app, eg. `RequestDecompressionMiddleware`.
+    middlewares: List[Any] = []
 
     def __init__(self) -> None:
         pass
 
+    tensor_content_type: str = TENSOR_CONTENT_TYPE
+
     @abstractmethod
     async def predict(self) -> None:
         pass
+
+    @staticmethod
+    def decode_tensors(body: Union[bytes, bytearray, memoryview]) -> Any:  # noqa: ANN401
+        """Decode a request body sent by `Predictor.infer_tensors`."""
+        return decode_tensors(body)
+
+    @staticmethod
+    def encode_tensors(obj: Any) -> bytes:  # noqa: ANN401
+        """Encode a response body that `Predictor.infer_tensors` decodes into numpy arrays."""
+        return encode_tensors(obj)
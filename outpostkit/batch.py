@@ -0,0 +1,318 @@
+import csv
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    Literal,
+    Optional,
+    Tuple,
+)
+
+import httpx
+
+from outpostkit.concurrency import (
+    AdaptiveConcurrencyPolicy,
+    CircuitOpenError,
+    ConcurrencyController,
+    ConcurrencyLimitError,
+    overloaded,
+)
+from outpostkit.exceptions import OutpostError, PredictionHTTPException
+from outpostkit.logger import init_outpost_logger
+from outpostkit.predictor import Predictor
+
+try:
+    import pyarrow.parquet as pq  # type: ignore
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+_log = init_outpost_logger(__name__)
+
+InputFormat = Literal["jsonl", "csv", "parquet"]
+
+_EXTENSIONS: Dict[str, InputFormat] = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+}
+
+
+@dataclass
+class BatchReport:
+    """Outcome of a `run_batch` call."""
+
+    output_path: str
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    """Rows already done by a previous run, resumed from the checkpoint."""
+
+    retries: int = 0
+    elapsed: float = 0
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+
+def iter_rows(
+    path: str, input_format: Optional[InputFormat] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the rows of a JSONL, CSV or Parquet file as dicts, without loading the file.
+    The format is guessed from the extension unless given.
+    """
+    if input_format is None:
+        input_format = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if input_format is None:
+            raise OutpostError(
+                f"Cannot guess the format of {path}, pass one of jsonl, csv or parquet."
+            )
+    if input_format == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif input_format == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif input_format == "parquet":
+        if not HAS_PYARROW:
+            raise OutpostError(
+                "Reading parquet files requires the 'pyarrow' package. Install it with `pip install pyarrow`."
+            )
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=1024):
+            yield from batch.to_pylist()
+    else:
+        raise OutpostError(f"Unsupported input format: {input_format}")
+
+
+def _default_output(resp: httpx.Response) -> Any:  # noqa: ANN401
+    content_type, _, _ = resp.headers.get("content-type", "").partition(";")
+    if content_type.strip() == "application/json":
+        return resp.json()
+    return resp.text
+
+
+def _status_of(error: Exception) -> Optional[int]:
+    if isinstance(error, PredictionHTTPException):
+        return error.status_code
+    return None
+
+
+def _retryable(status_code: Optional[int], error: Exception) -> bool:
+    """Whether an attempt failed because the endpoint is overloaded or could not be reached."""
+    if status_code is None:
+        return isinstance(error, httpx.TransportError)
+    return overloaded(status_code)
+
+
+def _error_record(
+    index: int, error: Exception, status_code: Optional[int]
+) -> Dict[str, Any]:
+    return {
+        "index": index,
+        "error": {
+            "type": type(error).__name__,
+            "message": str(error),
+            "status_code": status_code,
+        },
+    }
+
+
+class _Checkpoint:
+    """Number of rows written to the output, and the output size at that point."""
+
+    def __init__(self, path: str, input_path: str) -> None:
+        self.path = path
+        self.input_path = os.path.abspath(input_path)
+
+    def load(self) -> Tuple[int, int]:
+        if not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("input") != self.input_path:
+            raise OutpostError(
+                f"Checkpoint {self.path} belongs to another input: {state.get('input')}"
+            )
+        return state["rows"], state["output_offset"]
+
+    def save(self, rows: int, output_offset: int) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "input": self.input_path,
+                    "rows": rows,
+                    "output_offset": output_offset,
+                },
+                f,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def run_batch(  # pylint: disable=too-many-arguments,too-many-locals
+    predictor: Predictor,
+    input_path: str,
+    output_path: str,
+    *,
+    input_format: Optional[InputFormat] = None,
+    to_payload: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    to_output: Optional[Callable[[httpx.Response], Any]] = None,
+    concurrency: int = 8,
+    max_retries: int = 3,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: int = 1000,
+    controller: Optional[ConcurrencyController] = None,
+) -> BatchReport:
+    """
+    Run every row of an input file through an endpoint, writing one JSON line per row
+    to `output_path` in input order: `{"index": ..., "output": ...}` or
+    `{"index": ..., "error": {...}}` for rows that failed.
+
+    Progress is checkpointed every `checkpoint_every` rows, to `<output_path>.checkpoint`
+    by default. Running the same job again resumes after the last checkpoint, delete
+    the checkpoint to start over.
+
+    Rows are sent by up to `concurrency` threads, throttled by `controller`: an
+    adaptive concurrency limit that shrinks while the endpoint answers with 429/5xx or
+    cannot be reached. Such rows are retried up to `max_retries` times with backoff,
+    other failures are written right away. While the circuit of the controller is
+    open, the job pauses until it lets probes through.
+
+    Args:
+        to_payload: builds the `infer` keyword arguments of a row, defaults to sending the row as JSON.
+        to_output: extracts what to write from a response, defaults to its JSON body or text.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency should be at least 1, actual {concurrency}")
+    to_payload = to_payload or (lambda row: {"json": row})
+    to_output = to_output or _default_output
+    controller = controller or ConcurrencyController(
+        AdaptiveConcurrencyPolicy(
+            initial_limit=concurrency, max_limit=concurrency, open_time=5
+        )
+    )
+    checkpoint = _Checkpoint(checkpoint_path or f"{output_path}.checkpoint", input_path)
+    done, output_offset = checkpoint.load()
+    report = BatchReport(output_path=output_path, skipped=done)
+    if done:
+        _log.info("Resuming %s after %d rows.", input_path, done)
+    start = time.monotonic()
+
+    def admit() -> None:
+        # rows wait out an open circuit, it does not cost them a retry.
+        while True:
+            try:
+                controller.acquire()
+                return
+            except CircuitOpenError:
+                time.sleep(max(controller.open_for(), 0.05))
+            except ConcurrencyLimitError:
+                continue
+
+    def attempt(payload: Dict[str, Any]) -> Tuple[Optional[int], Any]:
+        """Returns: the status of the attempt and its response or exception."""
+        admit()
+        started = time.monotonic()
+        status_code: Optional[int] = None
+        # errors of the row itself, eg. a payload that is not JSON serializable.
+        client_error = False
+        try:
+            resp = predictor.infer(**payload)
+            status_code = resp.status_code
+            return status_code, resp
+        except Exception as e:  # noqa: BLE001
+            status_code = _status_of(e)
+            client_error = status_code is None and not _retryable(None, e)
+            return status_code, e
+        finally:
+            controller.release(
+                status_code=status_code,
+                latency=time.monotonic() - started,
+                cancelled=client_error,
+            )
+
+    def run(index: int, row: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        try:
+            payload = to_payload(row)  # type: ignore[misc]
+        except Exception as e:  # noqa: BLE001
+            return _error_record(index, e, None), 0
+        retries = 0
+        while True:
+            status_code, outcome = attempt(payload)
+            if not isinstance(outcome, Exception):
+                try:
+                    return {"index": index, "output": to_output(outcome)}, retries  # type: ignore[misc]
+                except Exception as e:  # noqa: BLE001
+                    return _error_record(index, e, status_code), retries
+            if not _retryable(status_code, outcome) or retries >= max_retries:
+                return _error_record(index, outcome, status_code), retries
+            retries += 1
+            time.sleep(
+                min(0.25 * 2 ** (retries - 1), 30) * random.uniform(0.5, 1.5)  # noqa: S311
+            )
+
+    rows = iter_rows(input_path, input_format)
+    for _ in range(done):
+        if next(rows, None) is None:
+            break
+
+    with open(output_path, "ab") as output:
+        # drop what was written after the last checkpoint, it is written again.
+        output.truncate(output_offset)
+        output.seek(output_offset)
+
+        def write(record: Dict[str, Any], retries: int) -> None:
+            nonlocal done
+            output.write(json.dumps(record, default=str).encode("utf-8") + b"\n")
+            done += 1
+            report.retries += retries
+            if "error" in record:
+                report.failed += 1
+            else:
+                report.succeeded += 1
+            if report.processed % checkpoint_every == 0:
+                save()
+
+        def save() -> None:
+            output.flush()
+            os.fsync(output.fileno())
+            checkpoint.save(done, output.tell())
+
+        queued: Deque[Future[Tuple[Dict[str, Any], int]]] = deque()
+        with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="outpost-batch"
+        ) as executor:
+            try:
+                for index, row in enumerate(rows, start=done):
+                    queued.append(executor.submit(run, index, row))
+                    while queued and (
+                        queued[0].done() or len(queued) >= 2 * concurrency
+                    ):
+                        write(*queued.popleft().result())
+                while queued:
+                    write(*queued.popleft().result())
+            finally:
+                for future in queued:
+                    future.cancel()
+                save()
+
+    report.elapsed = time.monotonic() - start
+    return report
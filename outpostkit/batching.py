@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence, Tuple
+
+from outpostkit.exceptions import OutpostError
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects concurrently submitted items into batches.
+
+    A batch is dispatched once `max_batch_size` items are queued or `max_wait`
+    seconds passed since its first item arrived. `send` receives the items of a
+    batch and must return one result per item, in the same order.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[Any]], Sequence[Any]],
+        *,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        max_concurrent_batches: int = 4,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError(
+                f"max_batch_size should be at least 1, actual {max_batch_size}"
+            )
+        if max_wait < 0:
+            raise ValueError(f"max_wait should not be negative, actual {max_wait}")
+
+        self._send = send
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._queue: queue.Queue[Any] = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_batches, thread_name_prefix="outpost-batch"
+        )
+        self._closed = False
+        # held while queueing, so that no item is queued after `_STOP`.
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(
+            target=self._run, name="outpost-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, item: Any) -> "Future[Any]":  # noqa: ANN401
+        """
+        Queue an item for the next batch.
+        Returns: a future resolving to the item's result.
+        """
+        future: Future[Any] = Future()
+        with self._lock:
+            if self._closed:
+                raise OutpostError("Batcher is closed.")
+            self._queue.put((item, future))
+        return future
+
+    def close(self) -> None:
+        """
+        Flush the queued items and stop the batcher.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join()
+        self._executor.shutdown(wait=True)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch: List[Tuple[Any, Future]] = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = (
+                        self._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[Tuple[Any, "Future[Any]"]]) -> None:
+        # drop the items whose callers already cancelled their future.
+        batch = [
+            (item, future)
+            for item, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            results = self._send(items)
+            if len(results) != len(items):
+                raise OutpostError(
+                    f"Batch split returned {len(results)} results for {len(items)} items."
+                )
+        except Exception as e:  # noqa: BLE001
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
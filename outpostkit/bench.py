@@ -0,0 +1,421 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+
+from outpostkit._utils.stats import percentiles
+from outpostkit.client import Client
+from outpostkit.endpoints import Endpoint
+from outpostkit.exceptions import PredictionHTTPException
+from outpostkit.predictor import Predictor
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, do not let Nagle delay the body.
+    disable_nagle_algorithm = True
+    server: "_StubHTTPServer"
+
+    def log_message(self, *_) -> None:
+        pass
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self) -> None:
+        stub = self.server.stub
+        if self.path == stub.healthcheck_path:
+            self._reply(200, {"status": "healthy"})
+        else:
+            self._reply(404, {"message": "Not found."})
+
+    def do_POST(self) -> None:
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get("content-length") or 0))
+        if self.path != stub.prediction_path:
+            self._reply(404, {"message": "Not found."})
+            return
+        time.sleep(stub.next_latency())
+        if random.random() < stub.failure_rate:  # noqa: S311
+            self._reply(stub.failure_status, {"message": "Injected failure."})
+        else:
+            self._reply(200, {"received_bytes": len(body)})
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    stub: "StubEndpoint"
+
+    def handle_error(self, request: Any, client_address: Any) -> None:  # noqa: ANN401
+        # clients hang up on cancelled hedges and timeouts, that is not an error.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubEndpoint:
+    """
+    A local stand-in for an endpoint, to benchmark without network access.
+
+    Predictions are answered after `latency` seconds (plus or minus up to `jitter`),
+    and fail with `failure_status` for a `failure_rate` fraction of the requests.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        latency: float = 0.01,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        prediction_path: str = "/predict",
+        healthcheck_path: str = "/healthcheck",
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.prediction_path = prediction_path
+        self.healthcheck_path = healthcheck_path
+        self._address = (host, port)
+        self._server: Optional[_StubHTTPServer] = None
+
+    def next_latency(self) -> float:
+        return max(self.latency + random.uniform(-self.jitter, self.jitter), 0)  # noqa: S311
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("The stub endpoint is not started.")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Serve in a background thread. Returns: the base url of the stub."""
+        if self._server is None:
+            self._server = _StubHTTPServer(self._address, _StubHandler)
+            self._server.stub = self
+            threading.Thread(
+                target=self._server.serve_forever, name="outpost-stub", daemon=True
+            ).start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StubEndpoint":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+
+@dataclass
+class BenchmarkResult:
+    """Outcome of a benchmark run, excluding the warmup."""
+
+    mode: str
+    """`open` (fixed arrival rate) or `closed` (fixed concurrency) loop."""
+
+    concurrency: int
+    target_qps: Optional[float]
+    duration: float
+    """Seconds between the end of the warmup and the last completed request."""
+
+    requests: int
+    errors: int
+    throughput: float
+    """Completed requests per second."""
+
+    latency: Dict[str, Optional[float]]
+    """Latency percentiles, mean and max in seconds."""
+
+    status_codes: Dict[str, int] = field(default_factory=dict)
+    error_types: Dict[str, int] = field(default_factory=dict)
+    started_at: str = ""
+    label: Optional[str] = None
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "error_rate": self.error_rate}
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "BenchmarkResult":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        data.pop("error_rate", None)
+        return cls(**data)
+
+    def compare(self, baseline: "BenchmarkResult") -> Dict[str, Optional[float]]:
+        """Relative change (0.1 is +10%) of the main metrics against a baseline run."""
+        metrics = {
+            "throughput": (self.throughput, baseline.throughput),
+            "error_rate": (self.error_rate, baseline.error_rate),
+            **{
+                name: (self.latency.get(name), baseline.latency.get(name))
+                for name in ("p50", "p95", "p99")
+            },
+        }
+        return {
+            name: (current - previous) / previous
+            if current is not None and previous
+            else None
+            for name, (current, previous) in metrics.items()
+        }
+
+
+class _Recorder:
+    def __init__(self, measure_from: float) -> None:
+        self.measure_from = measure_from
+        self.latencies: List[float] = []
+        self.status_codes: Counter = Counter()
+        self.error_types: Counter = Counter()
+        self.errors = 0
+        self.last_completion = measure_from
+        self._lock = threading.Lock()
+
+    def call(
+        self, predictor: Predictor, payload: Dict[str, Any], sent_at: float
+    ) -> None:
+        status: Optional[int] = None
+        error: Optional[str] = None
+        try:
+            status = predictor.infer(**payload).status_code
+        except PredictionHTTPException as e:
+            status, error = e.status_code, type(e).__name__
+        except Exception as e:  # noqa: BLE001
+            error = type(e).__name__
+        done = time.monotonic()
+        if sent_at < self.measure_from:
+            return
+        with self._lock:
+            # measured from when the request was due, so that queueing in an
+            # overloaded open loop shows up in the latencies.
+            self.latencies.append(done - sent_at)
+            self.status_codes[str(status)] += 1
+            if error is not None:
+                self.errors += 1
+                self.error_types[error] += 1
+            self.last_completion = max(self.last_completion, done)
+
+
+def run_benchmark(  # pylint: disable=too-many-arguments
+    predictor: Predictor,
+    payload: Dict[str, Any],
+    *,
+    duration: float = 30,
+    qps: Optional[float] = None,
+    concurrency: int = 16,
+    warmup: float = 0,
+    label: Optional[str] = None,
+) -> BenchmarkResult:
+    """
+    Drive a predictor with load and measure it.
+
+    Args:
+        payload: keyword arguments for `Predictor.infer`, sent with every request.
+        duration: seconds of measured load, after the warmup.
+        qps: open loop at this arrival rate; by default, a closed loop of `concurrency` callers.
+        concurrency: number of callers in a closed loop, or of requests in flight at once in an open loop.
+        warmup: seconds of load sent before measuring, eg. to open connections.
+    """
+    if qps is not None and qps <= 0:
+        raise ValueError(f"qps should be positive, actual {qps}")
+    started_at = datetime.now(timezone.utc).isoformat()
+    start = time.monotonic()
+    end = start + warmup + duration
+    recorder = _Recorder(measure_from=start + warmup)
+
+    if qps is not None:
+        interval = 1 / qps
+        with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="outpost-bench"
+        ) as executor:
+            sent = 0
+            while True:
+                due = start + sent * interval
+                if due >= end:
+                    break
+                time.sleep(max(due - time.monotonic(), 0))
+                executor.submit(recorder.call, predictor, payload, due)
+                sent += 1
+    else:
+
+        def caller() -> None:
+            while time.monotonic() < end:
+                recorder.call(predictor, payload, time.monotonic())
+
+        threads = [
+            threading.Thread(target=caller, name=f"outpost-bench-{i}")
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    latencies = recorder.latencies
+    elapsed = max(recorder.last_completion - recorder.measure_from, 1e-9)
+    p50, p90, p95, p99 = percentiles(latencies, 0.5, 0.9, 0.95, 0.99)
+    return BenchmarkResult(
+        mode="closed" if qps is None else "open",
+        concurrency=concurrency,
+        target_qps=qps,
+        duration=elapsed,
+        requests=len(latencies),
+        errors=recorder.errors,
+        throughput=len(latencies) / elapsed,
+        latency={
+            "p50": p50,
+            "p90": p90,
+            "p95": p95,
+            "p99": p99,
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "max": max(latencies, default=None),
+        },
+        status_codes=dict(recorder.status_codes),
+        error_types=dict(recorder.error_types),
+        started_at=started_at,
+        label=label,
+    )
+
+
+def _format_seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}ms"
+
+
+def _format_result(result: BenchmarkResult) -> str:
+    target = f" at {result.target_qps:g} qps" if result.target_qps else ""
+    lines = [
+        f"{result.mode} loop, concurrency {result.concurrency}{target}, {result.duration:.1f}s",
+        f"requests: {result.requests}, errors: {result.errors} ({result.error_rate:.2%}), throughput: {result.throughput:.1f}/s",
+        "latency: "
+        + ", ".join(
+            f"{name} {_format_seconds(value)}" for name, value in result.latency.items()
+        ),
+        f"status codes: {result.status_codes}",
+    ]
+    if result.error_types:
+        lines.append(f"errors: {result.error_types}")
+    return "\n".join(lines)
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m outpostkit.bench",
+        description="Benchmark an Outpost endpoint with open or closed loop load.",
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--endpoint", help="full name of an endpoint, eg. team/name")
+    target.add_argument("--url", help="base url of the endpoint to benchmark")
+    target.add_argument(
+        "--stub", action="store_true", help="benchmark a local stub endpoint"
+    )
+    parser.add_argument("--prediction-path", default="/predict")
+    parser.add_argument("--healthcheck-path", default="/healthcheck")
+    parser.add_argument("--api-token", help="defaults to $OUTPOST_API_TOKEN")
+    payload = parser.add_mutually_exclusive_group()
+    payload.add_argument("--json", default="{}", help="JSON body of the predictions")
+    payload.add_argument("--json-file", help="file holding the JSON body")
+    parser.add_argument("--qps", type=float, help="open loop arrival rate")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=0)
+    parser.add_argument("--label", help="name of the run, stored in the results")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results of a previous run")
+    parser.add_argument("--stub-latency", type=float, default=0.01)
+    parser.add_argument("--stub-jitter", type=float, default=0.0)
+    parser.add_argument("--stub-failure-rate", type=float, default=0.0)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = _parse_args(argv)
+    if args.json_file:
+        with open(args.json_file, encoding="utf-8") as f:
+            body = json.load(f)
+    else:
+        body = json.loads(args.json)
+
+    stub = None
+    client = Client(api_token=args.api_token)
+    if args.endpoint:
+        predictor = Endpoint(client, full_name=args.endpoint).create_predictor(
+            max_connections=args.concurrency
+        )
+    else:
+        if args.stub:
+            stub = StubEndpoint(
+                latency=args.stub_latency,
+                jitter=args.stub_jitter,
+                failure_rate=args.stub_failure_rate,
+                prediction_path=args.prediction_path,
+                healthcheck_path=args.healthcheck_path,
+            )
+        predictor = Predictor(
+            client,
+            stub.start() if stub else args.url,
+            args.prediction_path,
+            args.healthcheck_path,
+            max_connections=args.concurrency,
+        )
+
+    try:
+        with predictor:
+            result = run_benchmark(
+                predictor,
+                {"json": body},
+                duration=args.duration,
+                qps=args.qps,
+                concurrency=args.concurrency,
+                warmup=args.warmup,
+                label=args.label,
+            )
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    print(_format_result(result))
+    if args.output:
+        result.save(args.output)
+    if args.baseline:
+        changes = result.compare(BenchmarkResult.load(args.baseline))
+        print(
+            "vs baseline: "
+            + ", ".join(
+                f"{name} {'-' if change is None else f'{change:+.1%}'}"
+                for name, change in changes.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
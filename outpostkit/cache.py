@@ -0,0 +1,306 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Generic, Optional, Tuple, TypeVar
+
+import httpx
+
+from outpostkit._types.endpoint import EndpointResource
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    disk_hits: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache(Generic[V]):
+    """
+    A thread-safe in-memory LRU cache with an optional time-to-live per entry.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None) -> None:
+        if max_entries < 1:
+            raise ValueError(f"max_entries should be at least 1, actual {max_entries}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    A persistent key/value store backed by sqlite, with a time-to-live per entry.
+    Values are bytes; it is safe to share the file between threads and processes.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None) -> None:
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, expires_at REAL, value BLOB)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = (
+            self._connection()
+            .execute("SELECT expires_at, value FROM entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        expires_at, value = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, value),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM entries")
+
+
+def canonical_hash(*parts: Any) -> str:  # noqa: ANN401
+    """
+    A stable hash of JSON-compatible values, independent of dict key order.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(b"b")
+            digest.update(bytes(part))
+        else:
+            digest.update(b"j")
+            digest.update(
+                json.dumps(
+                    part, sort_keys=True, separators=(",", ":"), default=str
+                ).encode("utf-8")
+            )
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    A response cache for predictions of deterministic endpoints.
+
+    Responses are kept in an in-memory LRU and, when `path` is given, in an on-disk
+    sqlite store shared across processes. Only successful responses are cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 3600,
+        path: Optional[str] = None,
+    ) -> None:
+        self._memory: LRUCache[Tuple[int, Dict[str, str], bytes]] = LRUCache(
+            max_entries=max_entries, ttl=ttl
+        )
+        self._disk = DiskCache(path, ttl=ttl) if path else None
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._memory.stats.evictions,
+                disk_hits=self._stats.disk_hits,
+            )
+
+    @staticmethod
+    def key_for(endpoint: str, path: str, request_kwargs: Dict[str, Any]) -> str:
+        body = {
+            name: request_kwargs.get(name)
+            for name in ("json", "data", "params")
+            if request_kwargs.get(name) is not None
+        }
+        content = request_kwargs.get("content")
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return canonical_hash(endpoint, path, body, content)
+        return canonical_hash(endpoint, path, body)
+
+    def get(
+        self, key: str, request: Optional[httpx.Request] = None
+    ) -> Optional[httpx.Response]:
+        """The cached response, attached to `request` so that it can `raise_for_status`."""
+        entry = self._memory.get(key)
+        from_disk = False
+        if entry is None and self._disk is not None:
+            raw = self._disk.get(key)
+            if raw is not None:
+                entry = _loads_entry(raw)
+                self._memory.set(key, entry)
+                from_disk = True
+        with self._lock:
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            if from_disk:
+                self._stats.disk_hits += 1
+        status_code, headers, content = entry
+        return httpx.Response(
+            status_code, headers=headers, content=content, request=request
+        )
+
+    def set(self, key: str, resp: httpx.Response) -> None:
+        if not resp.is_success:
+            return
+        headers = {
+            name: value
+            for name, value in resp.headers.items()
+            # the cached content is already decoded.
+            if name.lower()
+            not in ("content-encoding", "content-length", "transfer-encoding")
+        }
+        entry = (resp.status_code, headers, resp.content)
+        self._memory.set(key, entry)
+        if self._disk is not None:
+            self._disk.set(key, _dumps_entry(entry))
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+
+def _dumps_entry(entry: Tuple[int, Dict[str, str], bytes]) -> bytes:
+    status_code, headers, content = entry
+    meta = json.dumps({"status_code": status_code, "headers": headers}).encode("utf-8")
+    return len(meta).to_bytes(4, "big") + meta + content
+
+
+def _loads_entry(raw: bytes) -> Tuple[int, Dict[str, str], bytes]:
+    meta_len = int.from_bytes(raw[:4], "big")
+    meta = json.loads(raw[4 : 4 + meta_len])
+    return meta["status_code"], meta["headers"], raw[4 + meta_len :]
+
+
+class EndpointMetadataCache:
+    """
+    Endpoint details shared by the `Endpoint`s of a client, so that predictors can be
+    created without a control-plane round trip.
+
+    Entries are kept in memory for `ttl` seconds and, when `path` is given, in an
+    on-disk sqlite store, so that a fresh process can reuse them.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 300,
+        max_entries: int = 256,
+        path: Optional[str] = None,
+    ) -> None:
+        self._memory: LRUCache[EndpointResource] = LRUCache(
+            max_entries=max_entries, ttl=ttl
+        )
+        self._disk = DiskCache(path, ttl=ttl) if path else None
+
+    def get(self, key: str) -> Optional[EndpointResource]:
+        endpt = self._memory.get(key)
+        if endpt is None and self._disk is not None:
+            raw = self._disk.get(key)
+            if raw is not None:
+                endpt = EndpointResource(**json.loads(raw))
+                self._memory.set(key, endpt)
+        return endpt
+
+    def set(self, key: str, data: Dict[str, Any]) -> EndpointResource:
+        """Cache the details of an endpoint, as returned by the API."""
+        endpt = EndpointResource(**data)
+        self._memory.set(key, endpt)
+        if self._disk is not None:
+            self._disk.set(key, json.dumps(data).encode("utf-8"))
+        return endpt
+
+    def invalidate(self, key: str) -> None:
+        self._memory.delete(key)
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
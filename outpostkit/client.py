@@ -1,9 +1,13 @@
+import asyncio
 import os
 import random
 import time
 from datetime import datetime
 from json import JSONDecodeError
 from typing import (
+    Any,
+    ContextManager,
+    Dict,
     Iterable,
     Mapping,
     Optional,
@@ -14,8 +18,24 @@ from typing import (
 import httpx
 
 from outpostkit._types.user import UserDetails
+from outpostkit._utils.stats import RatioBudget
+from outpostkit.cache import EndpointMetadataCache
+from outpostkit.compression import accept_encoding
 from outpostkit.constants import V1_API_URL
 from outpostkit.exceptions import OutpostError, OutpostHTTPException
+from outpostkit.instrumentation import Instrumentation, RequestTracer, measure, traced
+from outpostkit.pool import (
+    ConnectionProfile,
+    PoolMonitorTransport,
+    PoolStats,
+    ProfileName,
+    awarm_up,
+    find_pool_monitor,
+    get_profile,
+    warm_up,
+)
+from outpostkit.ratelimit import RateLimiter, RateLimitTransport
+from outpostkit.singleflight import SAFE_METHODS, SingleFlight
 
 
 class Client:
@@ -30,6 +50,12 @@ class Client:
         *,
         base_url: Optional[str] = V1_API_URL,
         timeout: Optional[httpx.Timeout] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        endpoint_cache: Optional[EndpointMetadataCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        singleflight: bool = False,
+        profile: Union[ProfileName, ConnectionProfile, None] = None,
+        warmup: int = 0,
         **kwargs,
     ) -> None:
         super().__init__()
@@ -38,8 +64,24 @@ class Client:
         self._base_url = base_url
         self._timeout = timeout
         self._client_kwargs = kwargs
+        self.profile = get_profile(profile) if profile is not None else None
+        """Connection pool, HTTP/2 and timeout settings of the client."""
+        self.instrumentation = instrumentation
+        """Records the timings of every request, for the client and its predictors."""
+        self.endpoint_cache = endpoint_cache or EndpointMetadataCache(
+            path=os.environ.get("OUTPOST_ENDPOINT_CACHE")
+        )
+        """Endpoint details used to create predictors, shared by the client's endpoints."""
+        self.rate_limiter = rate_limiter
+        """Throttles the requests of the client to the API, before the API does."""
+        self.singleflight = SingleFlight() if singleflight else None
+        """Collapses concurrent identical GET requests into one, when enabled."""
+        # shared by the sync and async clients, so that retries of both are capped together.
+        self._retry_budget = RatioBudget(ratio=0.2, max_tokens=10)
 
         self.poll_interval = float(os.environ.get("OUTPOST_POLL_INTERVAL", "0.5"))
+        if warmup:
+            self.warm_up(warmup)
 
     @property
     def _client(self) -> httpx.Client:
@@ -49,6 +91,9 @@ class Client:
                 self._api_token,
                 self._base_url,
                 self._timeout,
+                retry_budget=self._retry_budget,
+                rate_limiter=self.rate_limiter,
+                profile=self.profile,
                 **self._client_kwargs,
             )  # type: ignore[assignment]
         return self.__client  # type: ignore[return-value]
@@ -61,22 +106,90 @@ class Client:
                 self._api_token,
                 self._base_url,
                 self._timeout,
+                retry_budget=self._retry_budget,
+                rate_limiter=self.rate_limiter,
+                profile=self.profile,
                 **self._client_kwargs,
             )  # type: ignore[assignment]
         return self.__async_client  # type: ignore[return-value]
 
     def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
-        resp = self._client.request(method, path, **kwargs)
+        key = self._singleflight_key(method, path, kwargs)
+        if key is not None:
+            return self.singleflight.do(  # type: ignore[union-attr]
+                key, lambda: self._send(method, path, **kwargs)
+            )
+        return self._send(method, path, **kwargs)
+
+    async def _async_request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        key = self._singleflight_key(method, path, kwargs)
+        if key is not None:
+            return await self.singleflight.ado(  # type: ignore[union-attr]
+                key, lambda: self._async_send(method, path, **kwargs)
+            )
+        return await self._async_send(method, path, **kwargs)
+
+    def _singleflight_key(
+        self, method: str, path: str, kwargs: Dict[str, Any]
+    ) -> Optional[str]:
+        if self.singleflight is None or method.upper() not in SAFE_METHODS:
+            return None
+        return SingleFlight.key_for(method, path, kwargs)
+
+    def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        with self._measure(self._client, method, path) as tracer:
+            resp = self._client.request(method, path, **traced(kwargs, tracer))
+            if tracer is not None:
+                tracer.responded(resp)
         _raise_for_status(resp)
 
         return resp
 
-    async def _async_request(self, method: str, path: str, **kwargs) -> httpx.Response:
-        resp = await self._async_client.request(method, path, **kwargs)
+    async def _async_send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        with self._measure(self._async_client, method, path) as tracer:
+            resp = await self._async_client.request(
+                method, path, **traced(kwargs, tracer, asynchronous=True)
+            )
+            if tracer is not None:
+                tracer.responded(resp)
         _raise_for_status(resp)
 
         return resp
 
+    def _measure(
+        self,
+        http: Union[httpx.Client, httpx.AsyncClient],
+        method: str,
+        path: str,
+    ) -> ContextManager[Optional[RequestTracer]]:
+        return measure(self.instrumentation, str(http.base_url), method, path)
+
+    def warm_up(self, connections: int) -> int:
+        """
+        Open up to `connections` connections to the API ahead of the first calls.
+        Returns: the number of warm-up requests that got a response.
+        """
+        return warm_up(self._client, connections)
+
+    async def awarm_up(self, connections: int) -> int:
+        """`warm_up` for the async client."""
+        return await awarm_up(self._async_client, connections)
+
+    @property
+    def pool_stats(self) -> Optional[PoolStats]:
+        """
+        Usage of the connection pool of the client: connections, requests waiting for
+        one and their wait times. `None` with a custom transport.
+        """
+        monitor = find_pool_monitor(self._client)
+        return monitor.stats() if monitor is not None else None
+
+    @property
+    def async_pool_stats(self) -> Optional[PoolStats]:
+        """`pool_stats` of the async client."""
+        monitor = find_pool_monitor(self._async_client)
+        return monitor.stats() if monitor is not None else None
+
     @property
     def user(self) -> UserDetails:
         """
@@ -91,7 +204,13 @@ class Client:
 # Adapted from https://github.com/encode/httpx/issues/108#issuecomment-1132753155
 class RetryTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
     """A custom HTTP transport that automatically retries requests using an exponential backoff strategy
-    for specific HTTP status codes and request methods.
+    for specific HTTP status codes, connection errors and request methods.
+
+    Retries are drawn from `retry_budget`, a token bucket refilled by a fraction of the
+    requests sent, so that an outage does not turn into a retry storm. The total time
+    spent across all attempts of a request can be capped with `total_timeout`, or per
+    call with the `total_timeout` request extension (in seconds). Requests with the
+    `retry` extension set to `False` are sent once.
     """
 
     RETRYABLE_METHODS = frozenset(["HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE"])
@@ -102,6 +221,10 @@ class RetryTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
             504,  # Gateway Timeout
         ]
     )
+    # the request was never sent, retrying is safe for every method.
+    CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+    # the connection broke after the request was sent, only retried for retryable methods.
+    READ_ERRORS = (httpx.ReadError, httpx.RemoteProtocolError)
     MAX_BACKOFF_WAIT = 60
 
     def __init__(  # pylint: disable=too-many-arguments
@@ -114,6 +237,8 @@ class RetryTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
         jitter_ratio: float = 0.1,
         retryable_methods: Optional[Iterable[str]] = None,
         retry_status_codes: Optional[Iterable[int]] = None,
+        retry_budget: Optional[RatioBudget] = None,
+        total_timeout: Optional[float] = None,
     ) -> None:
         self._wrapped_transport = wrapped_transport
 
@@ -136,6 +261,9 @@ class RetryTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
         )
         self.jitter_ratio = jitter_ratio
         self.max_backoff_wait = max_backoff_wait
+        self.retry_budget = retry_budget or RatioBudget(ratio=0.2, max_tokens=10)
+        """Shared by every request of the transport; pass the same budget to share it further."""
+        self.total_timeout = total_timeout
 
     def _calculate_sleep(
         self, attempts_made: int, headers: Union[httpx.Headers, Mapping[str, str]]
@@ -158,57 +286,118 @@ class RetryTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
         total_backoff = backoff + jitter
         return min(total_backoff, self.max_backoff_wait)
 
-    def handle_request(self, request: httpx.Request) -> httpx.Response:
-        response = self._wrapped_transport.handle_request(request)  # type: ignore
+    def _deadline(self, request: httpx.Request) -> Optional[float]:
+        total_timeout = request.extensions.get("total_timeout", self.total_timeout)
+        return None if total_timeout is None else time.monotonic() + total_timeout
 
-        if request.method not in self.retryable_methods:
-            return response
+    @staticmethod
+    def _cap_timeouts(
+        request: httpx.Request,
+        timeouts: Mapping[str, Optional[float]],
+        deadline: Optional[float],
+    ) -> None:
+        """Shorten the timeouts of the next attempt so that it ends before the deadline."""
+        if deadline is None:
+            return
+        remaining = max(deadline - time.monotonic(), 0)
+        request.extensions["timeout"] = {
+            name: remaining if value is None else min(value, remaining)
+            for name, value in timeouts.items()
+        }
+
+    def _retry_sleep(
+        self,
+        attempts_made: int,
+        headers: Union[httpx.Headers, Mapping[str, str]],
+        deadline: Optional[float],
+    ) -> Optional[float]:
+        """Seconds to wait before the next attempt, `None` to not retry."""
+        if attempts_made >= self.max_attempts:
+            return None
+        sleep_for = self._calculate_sleep(attempts_made, headers)
+        if deadline is not None and time.monotonic() + sleep_for >= deadline:
+            return None
+        if not self.retry_budget.try_withdraw():
+            return None
+        return sleep_for
+
+    def _retryable_error(self, request: httpx.Request, error: Exception) -> bool:
+        return isinstance(error, self.CONNECT_ERRORS) or (
+            isinstance(error, self.READ_ERRORS)
+            and request.method in self.retryable_methods
+        )
 
-        remaining_attempts = self.max_attempts - 1
-        attempts_made = 1
+    def _retryable_response(
+        self, request: httpx.Request, response: httpx.Response
+    ) -> bool:
+        return (
+            request.method in self.retryable_methods
+            and response.status_code in self.retry_status_codes
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.extensions.get("retry") is False:
+            return self._wrapped_transport.handle_request(request)  # type: ignore
+        self.retry_budget.deposit()
+        deadline = self._deadline(request)
+        timeouts = dict(request.extensions.get("timeout", {}))
+        attempts_made = 0
 
         while True:
-            if (
-                remaining_attempts < 1
-                or response.status_code not in self.retry_status_codes
-            ):
+            self._cap_timeouts(request, timeouts, deadline)
+            try:
+                response = self._wrapped_transport.handle_request(request)  # type: ignore
+            except httpx.TransportError as e:
+                attempts_made += 1
+                if not self._retryable_error(request, e):
+                    raise
+                sleep_for = self._retry_sleep(attempts_made, {}, deadline)
+                if sleep_for is None:
+                    raise
+                time.sleep(sleep_for)
+                continue
+
+            attempts_made += 1
+            if not self._retryable_response(request, response):
+                return response
+            sleep_for = self._retry_sleep(attempts_made, response.headers, deadline)
+            if sleep_for is None:
                 return response
 
             response.close()
-
-            sleep_for = self._calculate_sleep(attempts_made, response.headers)
             time.sleep(sleep_for)
 
-            response = self._wrapped_transport.handle_request(request)  # type: ignore
-
-            attempts_made += 1
-            remaining_attempts -= 1
-
     async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
-        response = await self._wrapped_transport.handle_async_request(request)  # type: ignore
-
-        if request.method not in self.retryable_methods:
-            return response
-
-        remaining_attempts = self.max_attempts - 1
-        attempts_made = 1
+        if request.extensions.get("retry") is False:
+            return await self._wrapped_transport.handle_async_request(request)  # type: ignore
+        self.retry_budget.deposit()
+        deadline = self._deadline(request)
+        timeouts = dict(request.extensions.get("timeout", {}))
+        attempts_made = 0
 
         while True:
-            if (
-                remaining_attempts < 1
-                or response.status_code not in self.retry_status_codes
-            ):
-                return response
-
-            response.close()
-
-            sleep_for = self._calculate_sleep(attempts_made, response.headers)
-            time.sleep(sleep_for)
-
-            response = await self._wrapped_transport.handle_async_request(request)  # type: ignore
+            self._cap_timeouts(request, timeouts, deadline)
+            try:
+                response = await self._wrapped_transport.handle_async_request(request)  # type: ignore
+            except httpx.TransportError as e:
+                attempts_made += 1
+                if not self._retryable_error(request, e):
+                    raise
+                sleep_for = self._retry_sleep(attempts_made, {}, deadline)
+                if sleep_for is None:
+                    raise
+                await asyncio.sleep(sleep_for)
+                continue
 
             attempts_made += 1
-            remaining_attempts -= 1
+            if not self._retryable_response(request, response):
+                return response
+            sleep_for = self._retry_sleep(attempts_made, response.headers, deadline)
+            if sleep_for is None:
+                return response
+
+            await response.aclose()
+            await asyncio.sleep(sleep_for)
 
     async def aclose(self) -> None:
         await self._wrapped_transport.aclose()  # type: ignore
@@ -222,10 +411,15 @@ def _build_httpx_client(
     api_token: Optional[str] = None,
     base_url: Optional[str] = None,
     timeout: Optional[httpx.Timeout] = None,
+    retryable_methods: Optional[Iterable[str]] = None,
+    retry_budget: Optional[RatioBudget] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    profile: Union[ProfileName, ConnectionProfile, None] = None,
     **kwargs,
 ) -> Union[httpx.Client, httpx.AsyncClient]:
     headers = {
         "User-Agent": "outpost-python/0.0.69",
+        "Accept-Encoding": accept_encoding(),
     }
 
     if (
@@ -239,21 +433,32 @@ def _build_httpx_client(
     if base_url == "":
         base_url = "https://api.outpost.run"
 
-    timeout = timeout or httpx.Timeout(
-        5.0, read=30.0, write=30.0, connect=5.0, pool=10.0
-    )
+    connection_profile = get_profile(profile or "default")
+    timeout = timeout or connection_profile.timeout
 
-    transport = kwargs.pop("transport", None) or (
-        httpx.HTTPTransport()
-        if client_type is httpx.Client
-        else httpx.AsyncHTTPTransport()
-    )
+    transport = kwargs.pop("transport", None)
+    if transport is None:
+        transport = connection_profile.transport(
+            asynchronous=client_type is httpx.AsyncClient
+        )
+        transport = PoolMonitorTransport(
+            transport, max_connections=connection_profile.max_connections
+        )
+    elif profile is not None:
+        raise OutpostError("Pass either a transport or a connection profile.")
+    if rate_limiter is not None:
+        # below the retries, so that every attempt waits for the limiter.
+        transport = RateLimitTransport(transport, rate_limiter, base_url)
 
     return client_type(
         base_url=base_url,
         headers=headers,
         timeout=timeout,
-        transport=RetryTransport(wrapped_transport=transport),  # type: ignore[arg-type]
+        transport=RetryTransport(
+            wrapped_transport=transport,
+            retryable_methods=retryable_methods,
+            retry_budget=retry_budget,
+        ),  # type: ignore[arg-type]
         **kwargs,
     )
 
@@ -261,11 +466,6 @@ def _build_httpx_client(
 def _raise_for_status(resp: httpx.Response) -> None:
     if 400 <= resp.status_code < 600:
         content_type, _, _ = resp.headers["content-type"].partition(";")
-        # if content_type != "text/event-stream":
-        #     raise ValueError(
-        #         "Expected response Content-Type to be 'text/event-stream', "
-        #         f"got {content_type!r}"
-        #     )
         try:
             if content_type == "application/json":
                 try:
@@ -298,6 +498,12 @@ def _raise_for_status(resp: httpx.Response) -> None:
                 raise OutpostHTTPException(
                     status_code=resp.status_code, message=resp.text
                 )
+            elif content_type == "text/event-stream":
+                # streamed error responses are not read yet.
+                resp.read()
+                raise OutpostHTTPException(
+                    status_code=resp.status_code, message=resp.text
+                )
             else:
                 raise OutpostHTTPException(
                     status_code=resp.status_code,
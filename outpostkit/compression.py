@@ -0,0 +1,215 @@
+import gzip
+import io
+import json
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    MutableMapping,
+    Optional,
+)
+
+from outpostkit.exceptions import OutpostError
+
+try:
+    import zstandard  # type: ignore
+
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+try:
+    from httpx._decoders import SUPPORTED_DECODERS  # type: ignore
+
+    _DECODABLE = [name for name in SUPPORTED_DECODERS if name != "identity"]
+except ImportError:
+    _DECODABLE = ["gzip", "deflate"]
+
+RequestEncoding = Literal["gzip", "zstd"]
+
+
+class BodyTooLargeError(OutpostError):
+    """A compressed body inflates above the allowed size."""
+
+
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+"""Bodies smaller than this (in bytes) are sent uncompressed."""
+
+
+def accept_encoding() -> str:
+    """Value of the `Accept-Encoding` header, listing what httpx can decode here."""
+    return ", ".join(_DECODABLE)
+
+
+def compress(data: bytes, encoding: RequestEncoding) -> bytes:
+    if encoding == "gzip":
+        # a low level keeps compression cheaper than the transfer time it saves.
+        return gzip.compress(data, compresslevel=5)
+    if encoding == "zstd":
+        if not HAS_ZSTD:
+            raise OutpostError(
+                "zstd compression requires the 'zstandard' package. Install it with `pip install zstandard`."
+            )
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise OutpostError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(data: bytes, encoding: str, max_size: Optional[int] = None) -> bytes:
+    """Decompress a body, refusing to inflate it above `max_size` bytes."""
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return data
+    if encoding == "gzip":
+        return _read_limited(gzip.GzipFile(fileobj=io.BytesIO(data)), max_size)
+    if encoding == "zstd":
+        if not HAS_ZSTD:
+            raise OutpostError("zstd decompression requires the 'zstandard' package.")
+        return _read_limited(zstandard.ZstdDecompressor().stream_reader(data), max_size)
+    raise OutpostError(f"Unsupported content encoding: {encoding}")
+
+
+def compress_request(
+    kwargs: Dict[str, Any],
+    encoding: Optional[RequestEncoding],
+    threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+) -> Dict[str, Any]:
+    """
+    Compress the `json`, `content` or `data` body of httpx request keyword arguments.
+    Bodies below `threshold` bytes, streams and multipart requests are left alone.
+    """
+    if encoding is None or "files" in kwargs:
+        return kwargs
+    headers = dict(kwargs.get("headers") or {})
+    if any(name.lower() == "content-encoding" for name in headers):
+        return kwargs
+
+    kwargs = dict(kwargs)
+    if kwargs.get("json") is not None:
+        body = json.dumps(kwargs.pop("json"), separators=(",", ":")).encode("utf-8")
+        headers.setdefault("content-type", "application/json")
+    elif isinstance(kwargs.get("content"), (bytes, str)):
+        body = kwargs.pop("content")
+    elif isinstance(kwargs.get("data"), (bytes, str)):
+        body = kwargs.pop("data")
+    else:
+        return kwargs
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+
+    if len(body) >= threshold:
+        body = compress(body, encoding)
+        headers["content-encoding"] = encoding
+    kwargs["content"] = body
+    kwargs["headers"] = headers
+    return kwargs
+
+
+class RequestDecompressionMiddleware:
+    """
+    ASGI middleware decompressing `gzip`/`zstd` encoded request bodies.
+
+    Enable it in a template with `middlewares = [RequestDecompressionMiddleware]`.
+    Bodies inflating above `max_size` bytes are rejected with 413.
+    """
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        max_size: int = 1024 * 1024 * 1024,
+    ) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(
+        self,
+        scope: MutableMapping[str, Any],
+        receive: Callable[[], Awaitable[MutableMapping[str, Any]]],
+        send: Callable[[MutableMapping[str, Any]], Awaitable[None]],
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for name, value in scope.get("headers", []):
+            if name.lower() == b"content-encoding":
+                encoding = value.decode("latin-1")
+        if encoding is None or encoding.strip().lower() == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        chunks: List[bytes] = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        try:
+            body = decompress(b"".join(chunks), encoding, max_size=self.max_size)
+        except BodyTooLargeError as e:
+            await _respond(send, 413, str(e))
+            return
+        except OutpostError as e:
+            await _respond(send, 415, str(e))
+            return
+        except (OSError, EOFError, ValueError):
+            await _respond(send, 400, "Malformed compressed body.")
+            return
+
+        headers = [
+            (name, value)
+            for name, value in scope.get("headers", [])
+            if name.lower() not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        scope = {**scope, "headers": headers}
+
+        sent = False
+
+        async def replay() -> MutableMapping[str, Any]:
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, replay, send)
+
+
+async def _respond(
+    send: Callable[[MutableMapping[str, Any]], Awaitable[None]],
+    status: int,
+    message: str,
+) -> None:
+    body = message.encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"text/plain"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _read_limited(reader: Any, max_size: Optional[int]) -> bytes:  # noqa: ANN401
+    chunks: List[bytes] = []
+    total = 0
+    while True:
+        chunk = reader.read(64 * 1024)
+        if not chunk:
+            break
+        total += len(chunk)
+        if max_size is not None and total > max_size:
+            raise BodyTooLargeError(
+                f"Decompressed body is larger than max_size ({max_size})."
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
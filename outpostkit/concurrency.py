@@ -0,0 +1,294 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Literal, Optional, Tuple
+
+from outpostkit._utils.stats import RollingWindow
+from outpostkit.exceptions import OutpostError
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class ConcurrencyLimitError(OutpostError):
+    """A request could not be admitted by a `ConcurrencyController`."""
+
+
+class CircuitOpenError(ConcurrencyLimitError):
+    """The circuit of the endpoint is open, requests fail fast until it is probed again."""
+
+
+@dataclass
+class AdaptiveConcurrencyPolicy:
+    """
+    Limits of a `ConcurrencyController`.
+
+    The in-flight limit grows by one per window of successful requests and is cut by
+    `backoff_ratio` whenever a request is overloaded: a 429/502/503/504, no response,
+    or a smoothed latency above `latency_tolerance` times the median recent latency. The circuit
+    opens after `failure_threshold` consecutive overloaded responses.
+    """
+
+    initial_limit: int = 20
+    min_limit: int = 1
+    max_limit: int = 200
+
+    backoff_ratio: float = 0.9
+    """Factor the limit is multiplied by on overload."""
+
+    latency_tolerance: float = 2.0
+    """Smoothed latency, relative to the baseline, above which requests count as overloaded."""
+
+    smoothing: float = 0.1
+    """Weight of the latest latency in the smoothed (exponential moving average) latency."""
+
+    window_size: int = 100
+    """Number of recent latencies the baseline (median) latency is taken from."""
+
+    baseline_max_age: float = 60
+    """Seconds after which a latency no longer counts towards the baseline."""
+
+    max_wait: Optional[float] = None
+    """Seconds a request waits for a free slot before failing. Waits forever when `None`."""
+
+    failure_threshold: int = 5
+    """Consecutive overloaded responses after which the circuit opens."""
+
+    open_time: float = 10
+    """Seconds the circuit stays open before letting probes through."""
+
+    half_open_requests: int = 1
+    """Number of probe requests in flight while the circuit is half-open."""
+
+
+@dataclass
+class ConcurrencyState:
+    """Snapshot of a `ConcurrencyController`, eg. for dashboards."""
+
+    circuit: CircuitState
+    limit: int
+    in_flight: int
+    baseline_latency: Optional[float]
+    """Median latency of the recent window."""
+
+    smoothed_latency: Optional[float]
+    requests: int
+    overloads: int
+    """Number of requests that made the limit shrink."""
+
+    rejected: int
+    """Number of requests failed fast by the circuit or `max_wait`."""
+
+    circuit_opens: int
+
+
+def overloaded(status_code: Optional[int]) -> bool:
+    """Whether a response status (`None` for no response) means the endpoint is overloaded."""
+    return status_code is None or status_code in (429, 502, 503, 504)
+
+
+def _wake(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyController:
+    """
+    Adaptive (AIMD) limit of in-flight requests to an endpoint, with a circuit breaker.
+
+    Share one controller between the predictors of an endpoint. It can be used from
+    threads (`acquire`) and event loops (`aacquire`) at the same time; every admitted
+    request must be followed by a `release`.
+    """
+
+    def __init__(self, policy: Optional[AdaptiveConcurrencyPolicy] = None) -> None:
+        self.policy = policy or AdaptiveConcurrencyPolicy()
+        if not 1 <= self.policy.min_limit <= self.policy.max_limit:
+            raise ValueError(
+                f"Invalid limits: min_limit={self.policy.min_limit}, max_limit={self.policy.max_limit}"
+            )
+        self.latencies = RollingWindow(
+            size=self.policy.window_size, max_age=self.policy.baseline_max_age
+        )
+        self._limit = float(
+            min(
+                max(self.policy.initial_limit, self.policy.min_limit),
+                self.policy.max_limit,
+            )
+        )
+        self._in_flight = 0
+        self._consecutive_failures = 0
+        self._open_until: Optional[float] = None
+        self._half_open = False
+        self._decreased_at = float("-inf")
+        self._smoothed: Optional[float] = None
+        self._requests = 0
+        self._overloads = 0
+        self._rejected = 0
+        self._circuit_opens = 0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._async_waiters: List[
+            Tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]
+        ] = []
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _circuit(self) -> CircuitState:
+        if self._open_until is not None:
+            if time.monotonic() < self._open_until:
+                return "open"
+            self._open_until = None
+            self._half_open = True
+        return "half_open" if self._half_open else "closed"
+
+    def _try_admit(self) -> bool:
+        circuit = self._circuit()
+        if circuit == "open":
+            self._rejected += 1
+            raise CircuitOpenError(
+                "Circuit open: the endpoint is failing, not sending the request."
+            )
+        limit = self.policy.half_open_requests if circuit == "half_open" else self.limit
+        if self._in_flight < limit:
+            self._in_flight += 1
+            self._requests += 1
+            return True
+        return False
+
+    def _timed_out(self) -> ConcurrencyLimitError:
+        self._rejected += 1
+        return ConcurrencyLimitError(
+            f"No request slot freed up within {self.policy.max_wait} seconds."
+        )
+
+    def acquire(self) -> None:
+        """Wait for a request slot. Raises `CircuitOpenError` when the circuit is open."""
+        deadline = (
+            None
+            if self.policy.max_wait is None
+            else time.monotonic() + self.policy.max_wait
+        )
+        with self._cond:
+            while not self._try_admit():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise self._timed_out()
+                self._cond.wait(remaining)
+
+    async def aacquire(self) -> None:
+        """Wait for a request slot without blocking the event loop. See `acquire`."""
+        loop = asyncio.get_running_loop()
+        deadline = (
+            None if self.policy.max_wait is None else loop.time() + self.policy.max_wait
+        )
+        while True:
+            with self._lock:
+                if self._try_admit():
+                    return
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    raise self._timed_out()
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter[1]), remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def release(
+        self,
+        *,
+        status_code: Optional[int],
+        latency: Optional[float] = None,
+        cancelled: bool = False,
+    ) -> None:
+        """
+        Free the slot of an admitted request and adjust the limit from its outcome.
+
+        Args:
+            status_code: status of the response, `None` when there was no response.
+            latency: seconds from admission until the response headers arrived, or until the request failed.
+            cancelled: the request was abandoned by the caller, or failed on the caller's side before it was sent. Its outcome is ignored.
+        """
+        with self._lock:
+            self._in_flight = max(self._in_flight - 1, 0)
+            if not cancelled:
+                self._record(status_code, latency)
+            self._cond.notify_all()
+            for loop, future in self._async_waiters:
+                loop.call_soon_threadsafe(_wake, future)
+            self._async_waiters.clear()
+
+    def _record(self, status_code: Optional[int], latency: Optional[float]) -> None:
+        policy = self.policy
+        now = time.monotonic()
+        if overloaded(status_code):
+            self._consecutive_failures += 1
+            if (
+                self._half_open
+                or self._consecutive_failures >= policy.failure_threshold
+            ):
+                self._open()
+        else:
+            self._consecutive_failures = 0
+            self._half_open = False
+
+        if latency is not None and not overloaded(status_code):
+            self.latencies.add(latency)
+            self._smoothed = (
+                latency
+                if self._smoothed is None
+                else policy.smoothing * latency
+                + (1 - policy.smoothing) * self._smoothed
+            )
+        baseline = self.latencies.quantile(0.5)
+        slow = (
+            self._smoothed is not None
+            and baseline is not None
+            and self._smoothed > baseline * policy.latency_tolerance
+        )
+        if overloaded(status_code) or slow:
+            # requests sent before the last decrease already saw the smaller limit.
+            if latency is None or now - latency >= self._decreased_at:
+                self._overloads += 1
+                self._decreased_at = now
+                self._limit = max(self._limit * policy.backoff_ratio, policy.min_limit)
+            return
+        if latency is not None:
+            # only grow a limit that is actually in use.
+            if self._in_flight + 1 >= self.limit:
+                self._limit = min(self._limit + 1 / self._limit, policy.max_limit)
+
+    def open_for(self) -> float:
+        """Seconds until the open circuit lets probes through, 0 when it is not open."""
+        with self._lock:
+            if self._open_until is None:
+                return 0.0
+            return max(self._open_until - time.monotonic(), 0.0)
+
+    def _open(self) -> None:
+        self._open_until = time.monotonic() + self.policy.open_time
+        self._half_open = False
+        self._consecutive_failures = 0
+        self._circuit_opens += 1
+
+    def snapshot(self) -> ConcurrencyState:
+        with self._lock:
+            return ConcurrencyState(
+                circuit=self._circuit(),
+                limit=self.limit,
+                in_flight=self._in_flight,
+                baseline_latency=self.latencies.quantile(0.5),
+                smoothed_latency=self._smoothed,
+                requests=self._requests,
+                overloads=self._overloads,
+                rejected=self._rejected,
+                circuit_opens=self._circuit_opens,
+            )
@@ -1,9 +1,12 @@
+import asyncio
 import json
 import os
+import time
 from dataclasses import asdict, dataclass
-from typing import Any, Dict, List, Literal, Optional, Union
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
 from urllib.parse import urlparse
 
+import httpx
 from httpx import Response
 
 from outpostkit._types.endpoint import (
@@ -21,9 +24,10 @@ from outpostkit._utils.constants import (
     ServiceVisibility,
     scaffolding_file,
 )
+from outpostkit.balancer import BalancingStrategy, LoadBalancer
 from outpostkit.client import Client
-from outpostkit.exceptions import OutpostError
-from outpostkit.predictor import Predictor
+from outpostkit.exceptions import OutpostError, OutpostHTTPException
+from outpostkit.predictor import AsyncPredictor, Predictor
 from outpostkit.resource import Namespace
 from outpostkit.utils import parse_endpoint_log_data
 
@@ -46,6 +50,67 @@ class EndpointDeployResponse:
     id: int
 
 
+@dataclass
+class EndpointReadiness:
+    status: Optional[str]
+    """Status of the endpoint, see `Endpoint.status`."""
+
+    ready_replicas: Optional[int]
+    """Number of ready replicas, `None` if no runtime is deployed."""
+
+    healthy: bool
+    """Whether the healthcheck path responded successfully."""
+
+    @property
+    def ready(self) -> bool:
+        """The healthcheck succeeded and, when it is known, a replica is ready."""
+        return self.healthy and self.ready_replicas != 0
+
+
+def _next_readiness(
+    previous: Optional[EndpointReadiness],
+    status: Optional[str],
+    ready_replicas: Optional[int],
+    *,
+    healthy: bool,
+) -> Tuple[EndpointReadiness, bool]:
+    state = EndpointReadiness(
+        status=status, ready_replicas=ready_replicas, healthy=healthy
+    )
+    return state, state != previous
+
+
+def _next_poll_interval(  # pylint: disable=too-many-arguments
+    interval: float,
+    initial_interval: float,
+    max_interval: float,
+    backoff: float,
+    *,
+    changed: bool,
+) -> float:
+    # poll quickly again while the endpoint is making progress.
+    if changed:
+        return initial_interval
+    return min(interval * backoff, max_interval)
+
+
+def _prediction_base_url(endpt: EndpointResource) -> str:
+    if endpt.primaryDomain is None:
+        raise OutpostError("No primary domain set.")
+    return f"{endpt.primaryDomain.protocol}://{endpt.primaryDomain.name}"
+
+
+def _internal_urls(endpt: EndpointResource) -> List[str]:
+    urls = [
+        f"{domain.get('protocol') or 'http'}://{domain['name']}"
+        for domain in endpt.internalDomains or []
+        if domain.get("name")
+    ]
+    if not urls:
+        raise OutpostError("No internal domains set.")
+    return urls
+
+
 class Endpoint(Namespace):
     def __init__(
         self,
@@ -69,15 +134,50 @@ class Endpoint(Namespace):
 
         super().__init__(client)
 
-    def get(self) -> EndpointResource:
+    def get(self, *, use_cache: bool = False) -> EndpointResource:
         """
         Get essential details about the endpoint.
+        With `use_cache`, details cached by the client are returned when they are fresh
+        enough and the endpoint has a primary domain.
         """
+        cache = self._client.endpoint_cache
+        if use_cache:
+            endpt = cache.get(self._cache_key)
+            # details cached before the endpoint got a domain can not build a predictor.
+            if endpt is not None and endpt.primaryDomain is not None:
+                return endpt
 
         resp = self._client._request(path=f"/endpoints/{self.fullName}", method="GET")
         resp.raise_for_status()
 
-        return EndpointResource(**resp.json())
+        return cache.set(self._cache_key, resp.json())
+
+    async def async_get(self, *, use_cache: bool = False) -> EndpointResource:
+        """
+        Get essential details about the endpoint.
+        See `get`.
+        """
+        cache = self._client.endpoint_cache
+        if use_cache:
+            endpt = cache.get(self._cache_key)
+            # details cached before the endpoint got a domain can not build a predictor.
+            if endpt is not None and endpt.primaryDomain is not None:
+                return endpt
+
+        resp = await self._client._async_request(
+            path=f"/endpoints/{self.fullName}", method="GET"
+        )
+        resp.raise_for_status()
+
+        return cache.set(self._cache_key, resp.json())
+
+    @property
+    def _cache_key(self) -> str:
+        # the same names can exist on several Outpost deployments.
+        return f"{self._client._base_url}|{self.fullName}"
+
+    def _invalidate(self) -> None:
+        self._client.endpoint_cache.invalidate(self._cache_key)
 
     def list_deployments(
         self,
@@ -126,24 +226,57 @@ class Endpoint(Namespace):
             method="POST",
             json={"wakeup": wakeup},
         )
+        self._invalidate()
         return EndpointDeployResponse(**resp.json())
 
-    def create_predictor(self) -> Predictor:
+    def create_predictor(
+        self,
+        *,
+        use_internal_domains: bool = False,
+        balancing: BalancingStrategy = "least_outstanding",
+        **kwargs,
+    ) -> Predictor:
         """
         Creates a client to interact with the endpoint to get predictions.
+        The endpoint details cached by the client are reused when they are fresh enough.
+        With `use_internal_domains`, requests are load balanced over the endpoint's
+        internal domains (skipping the public ingress) using the `balancing` strategy.
+        Extra keyword arguments (pool size, http2, timeout, controller) are passed to `Predictor`.
         """
 
-        resp = self._client._request(path=f"/endpoints/{self.fullName}", method="GET")
-        resp.raise_for_status()
-
-        endpt = EndpointResource(**resp.json())
-        if endpt.primaryDomain is None:
-            raise OutpostError("No primary domain set.")
+        endpt = self.get(use_cache=True)
+        if use_internal_domains:
+            kwargs["balancer"] = LoadBalancer(_internal_urls(endpt), balancing)
         return Predictor(
             client=self._client,
-            endpoint=f"{endpt.primaryDomain.protocol}://{endpt.primaryDomain.name}",
+            endpoint=_prediction_base_url(endpt),
             predictionPath=endpt.predictionPath,
             healthcheckPath=endpt.healthcheckPath,
+            **kwargs,
+        )
+
+    async def create_async_predictor(
+        self,
+        *,
+        use_internal_domains: bool = False,
+        balancing: BalancingStrategy = "least_outstanding",
+        **kwargs,
+    ) -> AsyncPredictor:
+        """
+        Creates an asyncio client to interact with the endpoint to get predictions.
+        See `create_predictor` for load balancing over internal domains.
+        Extra keyword arguments (max_concurrency, timeout) are passed to `AsyncPredictor`.
+        """
+
+        endpt = await self.async_get(use_cache=True)
+        if use_internal_domains:
+            kwargs["balancer"] = LoadBalancer(_internal_urls(endpt), balancing)
+        return AsyncPredictor(
+            client=self._client,
+            endpoint=_prediction_base_url(endpt),
+            predictionPath=endpt.predictionPath,
+            healthcheckPath=endpt.healthcheckPath,
+            **kwargs,
         )
 
     def update(
@@ -157,6 +290,7 @@ class Endpoint(Namespace):
             f"/endpoints/{self.fullName}",
             json={"taskType": task_type, "hardwareInstance": hardware_instance},
         )
+        self._invalidate()
 
         return resp
 
@@ -168,13 +302,16 @@ class Endpoint(Namespace):
         self._client._request(
             "PUT", f"/endpoints/{self.fullName}/name", json={"name": name}
         )
+        self._invalidate()
         self.name = name
+        self.fullName = f"{self.entity}/{name}"
 
     def delete(self) -> None:
         """
         Delete the endpoint.
         """
         self._client._request("DELETE", f"/endpoints/{self.fullName}")
+        self._invalidate()
 
     def replica_status(self) -> EndpointReplicaStatus:
         """
@@ -197,6 +334,144 @@ class Endpoint(Namespace):
         )
         return resp.json().get("status")
 
+    async def async_replica_status(self) -> EndpointReplicaStatus:
+        """
+        Get the current replica status of the endpoint
+        Note: throws if there are no currently deployed runtimes of the endpoint.
+        """
+        resp = await self._client._async_request(
+            "GET",
+            f"/endpoints/{self.fullName}/replica-status",
+        )
+        return EndpointReplicaStatus(**resp.json())
+
+    async def async_status(self) -> Optional[str]:
+        """
+        Get the current status of the endpoint
+        """
+        resp = await self._client._async_request(
+            "GET",
+            f"/endpoints/{self.fullName}/status",
+        )
+        return resp.json().get("status")
+
+    def wait_until_ready(  # pylint: disable=too-many-arguments
+        self,
+        timeout: Optional[float] = 900,
+        initial_interval: Optional[float] = None,
+        max_interval: float = 30,
+        backoff: float = 2,
+        on_state_change: Optional[Callable[[EndpointReadiness], None]] = None,
+        predictor: Optional[Predictor] = None,
+    ) -> EndpointReadiness:
+        """
+        Block until the endpoint answers its healthcheck and, when the replica status
+        is known, has a ready replica.
+
+        Polls the endpoint status, replica status and healthcheck, starting every
+        `initial_interval` seconds (defaults to the client's poll interval) and backing
+        off exponentially up to `max_interval`. The interval resets whenever the state
+        changes, and `on_state_change` is called with the new state.
+        Raises `OutpostError` if the endpoint is not ready within `timeout` seconds.
+        """
+        interval = initial_interval or self._client.poll_interval
+        deadline = None if timeout is None else time.monotonic() + timeout
+        owns_predictor = predictor is None
+        state: Optional[EndpointReadiness] = None
+        try:
+            while True:
+                status = self.status()
+                try:
+                    ready_replicas = self.replica_status().readyReplicas
+                except OutpostHTTPException:
+                    # no runtime is deployed yet.
+                    ready_replicas = None
+
+                healthy = False
+                try:
+                    if predictor is None:
+                        predictor = self.create_predictor()
+                    healthy = predictor.healthcheck().is_success
+                except (httpx.TransportError, OutpostError):
+                    pass
+
+                state, changed = _next_readiness(
+                    state, status, ready_replicas, healthy=healthy
+                )
+                if changed and on_state_change is not None:
+                    on_state_change(state)
+                if state.ready:
+                    return state
+
+                interval = _next_poll_interval(
+                    interval,
+                    initial_interval or self._client.poll_interval,
+                    max_interval,
+                    backoff,
+                    changed=changed,
+                )
+                if deadline is not None and time.monotonic() + interval > deadline:
+                    raise OutpostError(
+                        f"Endpoint {self.fullName} not ready after {timeout} seconds. Last state: {state}"
+                    )
+                time.sleep(interval)
+        finally:
+            if owns_predictor and predictor is not None:
+                predictor.close()
+
+    async def async_wait_until_ready(  # pylint: disable=too-many-arguments
+        self,
+        timeout: Optional[float] = 900,
+        initial_interval: Optional[float] = None,
+        max_interval: float = 30,
+        backoff: float = 2,
+        on_state_change: Optional[Callable[[EndpointReadiness], None]] = None,
+        predictor: Optional[AsyncPredictor] = None,
+    ) -> EndpointReadiness:
+        """
+        Wait until the endpoint answers its healthcheck.
+        See `wait_until_ready`.
+        """
+        interval = initial_interval or self._client.poll_interval
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        state: Optional[EndpointReadiness] = None
+        while True:
+            status = await self.async_status()
+            try:
+                ready_replicas = (await self.async_replica_status()).readyReplicas
+            except OutpostHTTPException:
+                ready_replicas = None
+
+            healthy = False
+            try:
+                if predictor is None:
+                    predictor = await self.create_async_predictor()
+                healthy = (await predictor.ahealthcheck()).is_success
+            except (httpx.TransportError, OutpostError):
+                pass
+
+            state, changed = _next_readiness(
+                state, status, ready_replicas, healthy=healthy
+            )
+            if changed and on_state_change is not None:
+                on_state_change(state)
+            if state.ready:
+                return state
+
+            interval = _next_poll_interval(
+                interval,
+                initial_interval or self._client.poll_interval,
+                max_interval,
+                backoff,
+                changed=changed,
+            )
+            if deadline is not None and loop.time() + interval > deadline:
+                raise OutpostError(
+                    f"Endpoint {self.fullName} not ready after {timeout} seconds. Last state: {state}"
+                )
+            await asyncio.sleep(interval)
+
     def get_logs(
         self,
         log_type: Optional[Literal["dep", "runtime", "event"]] = None,
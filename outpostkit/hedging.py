@@ -0,0 +1,73 @@
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from outpostkit._utils.stats import RatioBudget, RollingWindow
+
+
+@dataclass
+class HedgingPolicy:
+    """
+    Send a duplicate request when a prediction takes longer than usual.
+    The first successful response wins.
+    """
+
+    delay: Optional[float] = None
+    """Fixed hedge delay in seconds. Defaults to the tracked `percentile` latency."""
+
+    percentile: float = 0.95
+    """Latency percentile of recent predictions used as the hedge delay."""
+
+    min_samples: int = 20
+    """Number of observed latencies needed before hedging with the tracked percentile."""
+
+    max_hedge_ratio: float = 0.1
+    """Upper bound of hedged requests as a fraction of all requests."""
+
+    max_burst: float = 10
+    """Number of hedges that can be sent in a burst above `max_hedge_ratio`."""
+
+    window_size: int = 1000
+    """Number of recent latencies tracked."""
+
+
+class Hedger:
+    """
+    Tracks prediction latencies and the hedge budget of a predictor.
+    """
+
+    def __init__(self, policy: HedgingPolicy) -> None:
+        self.policy = policy
+        self.latencies = RollingWindow(size=policy.window_size)
+        self._budget = RatioBudget(
+            ratio=policy.max_hedge_ratio, max_tokens=policy.max_burst
+        )
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging the current request, `None` to not hedge."""
+        with self._lock:
+            self.requests += 1
+        self._budget.deposit()
+        if self.policy.delay is not None:
+            return self.policy.delay
+        if len(self.latencies) < self.policy.min_samples:
+            return None
+        return self.latencies.quantile(self.policy.percentile)
+
+    def try_hedge(self) -> bool:
+        if self._budget.try_withdraw():
+            with self._lock:
+                self.hedges += 1
+            return True
+        return False
+
+    def observe(self, latency: float) -> None:
+        self.latencies.add(latency)
+
+    def record_hedge_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
@@ -0,0 +1,255 @@
+import abc
+import contextlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import httpx
+
+from outpostkit._utils.stats import RollingWindow
+from outpostkit.logger import init_outpost_logger
+
+_log = init_outpost_logger(__name__)
+
+
+@dataclass
+class RequestTimings:
+    """
+    Timings of a single call, in seconds.
+
+    Phases of retried calls add up over all attempts, and `total` includes the
+    backoff between them. `connect` includes the DNS resolution.
+    """
+
+    endpoint: str
+    """Base url the call was made to."""
+
+    route: str
+    """Method and path of the call, eg. `POST /predict`."""
+
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    """Name of the exception raised by the call, if it failed."""
+
+    retries: int = 0
+    pool_wait: Optional[float] = None
+    """Time until the first attempt got a connection from the pool."""
+
+    connect: Optional[float] = None
+    tls: Optional[float] = None
+    ttfb: Optional[float] = None
+    """Time from sending the request headers to receiving the response headers."""
+
+    total: float = 0
+    bytes_sent: Optional[int] = None
+    bytes_received: Optional[int] = None
+
+
+@dataclass
+class LatencySummary:
+    count: int
+    p50: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+
+
+class Exporter(abc.ABC):
+    """
+    Receives the timings of every instrumented call, eg. to feed Prometheus or
+    OpenTelemetry metrics. `export` is called on the caller's thread, keep it cheap.
+    """
+
+    @abc.abstractmethod
+    def export(self, timings: RequestTimings) -> None:
+        pass
+
+
+class RequestTracer:
+    """
+    A `trace` extension callback for httpx/httpcore timing the phases of a call.
+    """
+
+    def __init__(
+        self,
+        instrumentation: "Instrumentation",
+        endpoint: str,
+        route: str,
+        forward: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ) -> None:
+        self._instrumentation = instrumentation
+        self._forward = forward
+        self._start = time.monotonic()
+        self._started: Dict[str, float] = {}
+        self._attempts = 0
+        self._in_attempt = False
+        self._headers_sent: Optional[float] = None
+        self._response: Optional[httpx.Response] = None
+        self.timings = RequestTimings(endpoint=endpoint, route=route)
+
+    def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        if self._forward is not None:
+            self._forward(event_name, info)
+        now = time.monotonic()
+        _, _, name = event_name.partition(".")
+        phase, _, stage = name.rpartition(".")
+        if stage == "started":
+            if (
+                phase in ("connect_tcp", "send_request_headers")
+                and not self._in_attempt
+            ):
+                self._in_attempt = True
+                self._attempts += 1
+                if self._attempts == 1:
+                    self.timings.pool_wait = now - self._start
+            if phase == "send_request_headers":
+                self._headers_sent = now
+            self._started[phase] = now
+            return
+
+        if stage == "failed":
+            self._in_attempt = False
+        started = self._started.pop(phase, None)
+        if started is None:
+            return
+        timings = self.timings
+        if phase == "connect_tcp":
+            timings.connect = (timings.connect or 0) + now - started
+        elif phase == "start_tls":
+            timings.tls = (timings.tls or 0) + now - started
+        elif phase == "receive_response_headers" and stage == "complete":
+            timings.ttfb = (timings.ttfb or 0) + now - (self._headers_sent or started)
+            self._in_attempt = False
+
+    async def atrace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """The `trace` callback of async clients."""
+        self(event_name, info)
+
+    def responded(self, resp: httpx.Response) -> None:
+        self._response = resp
+        self.timings.status_code = resp.status_code
+        content_length = resp.request.headers.get("content-length")
+        if content_length is not None and content_length.isdigit():
+            self.timings.bytes_sent = int(content_length)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        timings = self.timings
+        timings.total = time.monotonic() - self._start
+        timings.retries = max(self._attempts - 1, 0)
+        if error is not None:
+            timings.error = type(error).__name__
+        if self._response is not None:
+            timings.bytes_received = self._response.num_bytes_downloaded
+        self._instrumentation.record(timings)
+
+
+class Instrumentation:
+    """
+    Collects per-request timings of clients and predictors.
+
+    Total latencies are kept in rolling histograms per endpoint and route, and every
+    call's `RequestTimings` are handed to the `exporters`.
+    """
+
+    def __init__(
+        self,
+        exporters: Optional[Sequence[Exporter]] = None,
+        *,
+        window_size: int = 1000,
+        max_age: Optional[float] = 300,
+    ) -> None:
+        self.exporters: List[Exporter] = list(exporters or [])
+        self.window_size = window_size
+        self.max_age = max_age
+        self._histograms: Dict[Tuple[str, str], RollingWindow] = {}
+        self._lock = threading.Lock()
+
+    def add_exporter(self, exporter: Exporter) -> None:
+        self.exporters.append(exporter)
+
+    @contextlib.contextmanager
+    def measure(
+        self,
+        endpoint: str,
+        method: str,
+        path: str,
+        forward: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ) -> Iterator[RequestTracer]:
+        """
+        Time a call. Pass the yielded tracer as the `trace` request extension and
+        call its `responded` once the response headers arrived.
+        """
+        tracer = RequestTracer(self, endpoint, f"{method} {path}", forward)
+        try:
+            yield tracer
+        except BaseException as e:
+            tracer.finish(error=e)
+            raise
+        tracer.finish()
+
+    def record(self, timings: RequestTimings) -> None:
+        key = (timings.endpoint, timings.route)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = RollingWindow(
+                    size=self.window_size, max_age=self.max_age
+                )
+        histogram.add(timings.total)
+        for exporter in self.exporters:
+            try:
+                exporter.export(timings)
+            except Exception:  # noqa: BLE001
+                _log.warning("Exporter %r failed.", exporter, exc_info=True)
+
+    def histograms(self) -> Dict[Tuple[str, str], LatencySummary]:
+        """p50/p95/p99 of the total latency of recent calls, keyed by (endpoint, route)."""
+        with self._lock:
+            histograms = list(self._histograms.items())
+        summaries: Dict[Tuple[str, str], LatencySummary] = {}
+        for key, histogram in histograms:
+            values = histogram.values()
+            p50, p95, p99 = histogram.percentiles(0.5, 0.95, 0.99)
+            summaries[key] = LatencySummary(
+                count=len(values), p50=p50, p95=p95, p99=p99
+            )
+        return summaries
+
+
+def measure(
+    instrumentation: Optional[Instrumentation],
+    endpoint: str,
+    method: str,
+    path: str,
+    forward: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> ContextManager[Optional[RequestTracer]]:
+    """`Instrumentation.measure`, or a no-op when there is no instrumentation."""
+    if instrumentation is None:
+        return contextlib.nullcontext()
+    return instrumentation.measure(endpoint, method, path, forward)
+
+
+def traced(
+    kwargs: Dict[str, Any],
+    tracer: Optional[RequestTracer],
+    *,
+    asynchronous: bool = False,
+) -> Dict[str, Any]:
+    """Request keyword arguments with `tracer` set as the `trace` extension."""
+    if tracer is None:
+        return kwargs
+    extensions = {
+        "trace": tracer.atrace if asynchronous else tracer,
+        **(kwargs.get("extensions") or {}),
+    }
+    return {**kwargs, "extensions": extensions}
@@ -0,0 +1,278 @@
+import asyncio
+import importlib.util
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Literal, Optional, Union
+
+import httpx
+
+from outpostkit._utils.stats import RollingWindow
+from outpostkit.exceptions import OutpostError
+from outpostkit.logger import init_outpost_logger
+
+_log = init_outpost_logger(__name__)
+
+HAS_H2 = importlib.util.find_spec("h2") is not None
+
+ProfileName = Literal["default", "high-concurrency", "low-latency", "bulk-transfer"]
+
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """Connection pool limits, keep-alive, HTTP/2 and timeouts of a client, set together."""
+
+    max_connections: Optional[int]
+    max_keepalive_connections: Optional[int]
+    keepalive_expiry: Optional[float]
+    timeout: httpx.Timeout
+    http2: bool = False
+    """Used only when the 'h2' package is installed, HTTP/1.1 is used otherwise."""
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def transport(
+        self, *, asynchronous: bool = False
+    ) -> Union[httpx.HTTPTransport, httpx.AsyncHTTPTransport]:
+        transport_type = (
+            httpx.AsyncHTTPTransport if asynchronous else httpx.HTTPTransport
+        )
+        return transport_type(limits=self.limits, http2=self.http2 and HAS_H2)
+
+
+PROFILES: Dict[str, ConnectionProfile] = {
+    # httpx's pool defaults.
+    "default": ConnectionProfile(
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=5.0,
+        timeout=httpx.Timeout(5.0, read=30.0, write=30.0, connect=5.0, pool=10.0),
+    ),
+    # many concurrent callers: a large pool kept alive, multiplexed over HTTP/2.
+    "high-concurrency": ConnectionProfile(
+        max_connections=500,
+        max_keepalive_connections=200,
+        keepalive_expiry=30.0,
+        timeout=httpx.Timeout(5.0, read=60.0, write=60.0, connect=5.0, pool=30.0),
+        http2=True,
+    ),
+    # every connection stays warm, and calls fail fast instead of queueing.
+    "low-latency": ConnectionProfile(
+        max_connections=100,
+        max_keepalive_connections=100,
+        keepalive_expiry=60.0,
+        timeout=httpx.Timeout(2.0, read=10.0, write=10.0, connect=2.0, pool=1.0),
+    ),
+    # few long transfers: one TCP connection each, with long read/write timeouts.
+    "bulk-transfer": ConnectionProfile(
+        max_connections=16,
+        max_keepalive_connections=16,
+        keepalive_expiry=30.0,
+        timeout=httpx.Timeout(10.0, read=300.0, write=300.0, connect=10.0, pool=60.0),
+    ),
+}
+
+
+def get_profile(profile: Union[str, ConnectionProfile]) -> ConnectionProfile:
+    if isinstance(profile, ConnectionProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise OutpostError(
+            f"Unknown connection profile: {profile}, expected one of {', '.join(PROFILES)}"
+        ) from None
+
+
+@dataclass
+class PoolStats:
+    """Usage of a client's connection pool."""
+
+    max_connections: Optional[int]
+    connections: int
+    idle_connections: int
+    waiting: int
+    """Requests waiting for a connection right now."""
+
+    pool_timeouts: int
+    """Requests that gave up waiting for a connection."""
+
+    wait_p50: Optional[float]
+    wait_p99: Optional[float]
+    """Seconds recent requests waited for a connection."""
+
+    @property
+    def saturation(self) -> float:
+        """Share of the pool in use, above 1 when requests are waiting."""
+        if not self.max_connections:
+            return 0.0
+        active = self.connections - self.idle_connections + self.waiting
+        return active / self.max_connections
+
+
+class _Waiting:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.acquired = False
+
+
+class PoolMonitorTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """
+    Wraps an `HTTPTransport`/`AsyncHTTPTransport` to measure how long requests wait
+    for a connection of its pool, ie. until the first connection event is traced.
+    """
+
+    def __init__(
+        self,
+        wrapped_transport: Union[httpx.BaseTransport, httpx.AsyncBaseTransport],
+        max_connections: Optional[int] = None,
+    ) -> None:
+        self._wrapped_transport = wrapped_transport
+        self.max_connections = max_connections
+        self.waits = RollingWindow(size=1000, max_age=300)
+        self._waiting = 0
+        self._pool_timeouts = 0
+        self._lock = threading.Lock()
+
+    def _begin(self) -> _Waiting:
+        with self._lock:
+            self._waiting += 1
+        return _Waiting()
+
+    def _acquired(self, waiting: _Waiting) -> None:
+        with self._lock:
+            if waiting.acquired:
+                return
+            waiting.acquired = True
+            self._waiting -= 1
+        self.waits.add(time.monotonic() - waiting.started)
+
+    def _end(self, waiting: _Waiting, error: Optional[Exception]) -> None:
+        with self._lock:
+            if isinstance(error, httpx.PoolTimeout):
+                self._pool_timeouts += 1
+            if not waiting.acquired:
+                waiting.acquired = True
+                self._waiting -= 1
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        waiting = self._begin()
+        forward = request.extensions.get("trace")
+
+        def trace(event_name: str, info: Dict[str, Any]) -> None:
+            self._acquired(waiting)
+            if forward is not None:
+                forward(event_name, info)
+
+        error: Optional[Exception] = None
+        extensions = request.extensions
+        request.extensions = {**extensions, "trace": trace}
+        try:
+            return self._wrapped_transport.handle_request(request)  # type: ignore
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # retried requests are sent again, do not wrap the tracer twice.
+            request.extensions = extensions
+            self._end(waiting, error)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        waiting = self._begin()
+        forward = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            self._acquired(waiting)
+            if forward is not None:
+                await forward(event_name, info)
+
+        error: Optional[Exception] = None
+        extensions = request.extensions
+        request.extensions = {**extensions, "trace": trace}
+        try:
+            return await self._wrapped_transport.handle_async_request(request)  # type: ignore
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # retried requests are sent again, do not wrap the tracer twice.
+            request.extensions = extensions
+            self._end(waiting, error)
+
+    def _connections(self) -> List[Any]:
+        pool = getattr(self._wrapped_transport, "_pool", None)
+        return list(getattr(pool, "connections", None) or [])
+
+    def stats(self) -> PoolStats:
+        connections = self._connections()
+        wait_p50, wait_p99 = self.waits.percentiles(0.5, 0.99)
+        with self._lock:
+            return PoolStats(
+                max_connections=self.max_connections,
+                connections=len(connections),
+                idle_connections=sum(1 for conn in connections if conn.is_idle()),
+                waiting=self._waiting,
+                pool_timeouts=self._pool_timeouts,
+                wait_p50=wait_p50,
+                wait_p99=wait_p99,
+            )
+
+    async def aclose(self) -> None:
+        await self._wrapped_transport.aclose()  # type: ignore
+
+    def close(self) -> None:
+        self._wrapped_transport.close()  # type: ignore
+
+
+def find_pool_monitor(
+    http: Union[httpx.Client, httpx.AsyncClient],
+) -> Optional[PoolMonitorTransport]:
+    """The `PoolMonitorTransport` among the wrapped transports of a client, if any."""
+    transport = http._transport
+    while transport is not None:
+        if isinstance(transport, PoolMonitorTransport):
+            return transport
+        transport = getattr(transport, "_wrapped_transport", None)
+    return None
+
+
+def warm_up(http: httpx.Client, connections: int, path: str = "/") -> int:
+    """
+    Open up to `connections` connections of the client's pool ahead of the first
+    calls, with concurrent `GET` requests to `path`. Any response will do.
+    Returns: the number of requests that got a response.
+    """
+
+    def head(_: int) -> bool:
+        try:
+            http.request("GET", path)
+            return True
+        except httpx.HTTPError as e:
+            _log.debug("Warm-up request failed: %s", e)
+            return False
+
+    with ThreadPoolExecutor(
+        max_workers=max(connections, 1), thread_name_prefix="outpost-warmup"
+    ) as executor:
+        return sum(executor.map(head, range(connections)))
+
+
+async def awarm_up(http: httpx.AsyncClient, connections: int, path: str = "/") -> int:
+    """`warm_up` for async clients."""
+
+    async def head() -> bool:
+        try:
+            await http.request("GET", path)
+            return True
+        except httpx.HTTPError as e:
+            _log.debug("Warm-up request failed: %s", e)
+            return False
+
+    return sum(await asyncio.gather(*[head() for _ in range(connections)]))
@@ -1,20 +1,73 @@
+import asyncio
+import contextlib
+import importlib.util
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass, field
 from json import JSONDecodeError
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
 
-import requests
+import httpx
 
-from outpostkit.client import Client
+from outpostkit.balancer import LoadBalancer, target_failed
+from outpostkit.batching import MicroBatcher
+from outpostkit.cache import PredictionCache
+from outpostkit.client import Client, RetryTransport, _build_httpx_client
+from outpostkit.compression import (
+    DEFAULT_COMPRESSION_THRESHOLD,
+    RequestEncoding,
+    compress_request,
+)
+from outpostkit.concurrency import ConcurrencyController
 from outpostkit.exceptions import OutpostError, PredictionHTTPException
+from outpostkit.hedging import Hedger, HedgingPolicy
+from outpostkit.instrumentation import (
+    Instrumentation,
+    RequestTracer,
+    measure,
+    traced,
+)
+from outpostkit.pool import PoolMonitorTransport, PoolStats, find_pool_monitor, warm_up
 from outpostkit.resource import Namespace
+from outpostkit.singleflight import SingleFlight
+from outpostkit.streaming import (
+    EVENT_STREAM_CONTENT_TYPE,
+    ServerSentEvent,
+    aiter_sse,
+    iter_sse,
+)
+from outpostkit.tensor_codec import (
+    TENSOR_CONTENT_TYPE,
+    decode_tensors,
+    encode_tensors,
+)
 
 
-def _raise_for_status(resp: requests.Response) -> None:
+def _raise_for_status(resp: httpx.Response) -> None:
     if 400 <= resp.status_code < 600:
         content_type, _, _ = resp.headers["content-type"].partition(";")
-        # if content_type != "text/event-stream":
-        #     raise ValueError(
-        #         "Expected response Content-Type to be 'text/event-stream', "
-        #         f"got {content_type!r}"
-        #     )
         try:
             if content_type == "application/json":
                 try:
@@ -41,6 +94,12 @@ def _raise_for_status(resp: requests.Response) -> None:
                 raise PredictionHTTPException(
                     status_code=resp.status_code, message=resp.text
                 )
+            elif content_type == "text/event-stream":
+                # streamed error responses are not read yet.
+                resp.read()
+                raise PredictionHTTPException(
+                    status_code=resp.status_code, message=resp.text
+                )
             else:
                 raise PredictionHTTPException(
                     status_code=resp.status_code,
@@ -50,8 +109,171 @@ def _raise_for_status(resp: requests.Response) -> None:
             raise
 
 
+@dataclass
+class _Route:
+    url: str
+    status_code: Optional[int] = None
+    latency: Optional[float] = None
+    """Seconds until the response headers arrived."""
+
+    cancelled: bool = False
+    started: float = field(default_factory=time.monotonic)
+
+    def responded(self, resp: httpx.Response) -> None:
+        self.status_code = resp.status_code
+        self.latency = time.monotonic() - self.started
+
+
+@contextlib.contextmanager
+def _route(
+    balancer: Optional[LoadBalancer],
+    path: str,
+    controller: Optional[ConcurrencyController] = None,
+) -> Iterator[_Route]:
+    """
+    Resolve the url of a request, picking a target when load balancing.
+    The request must already be admitted by `controller`, which is released on exit.
+    """
+    target = balancer.acquire() if balancer is not None else None
+    route = _Route(url=f"{target.url}{path}" if target is not None else path)
+    transport_error = False
+    try:
+        yield route
+    except asyncio.CancelledError:
+        route.cancelled = True
+        raise
+    except httpx.TransportError:
+        transport_error = True
+        raise
+    finally:
+        # other errors raised before a response (eg. an unserializable payload) are the
+        # caller's doing, they say nothing of the target or its load.
+        neutral = route.cancelled or (route.status_code is None and not transport_error)
+        if target is not None:
+            balancer.release(  # type: ignore[union-attr]
+                target,
+                success=None
+                if neutral
+                else not (transport_error or target_failed(route.status_code)),  # type: ignore[arg-type]
+            )
+        if controller is not None:
+            controller.release(
+                status_code=route.status_code,
+                latency=route.latency or time.monotonic() - route.started,
+                cancelled=neutral,
+            )
+
+
+def _close_response(future: "Future[httpx.Response]") -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _tensor_request(payload: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:  # noqa: ANN401
+    return {
+        **kwargs,
+        "content": encode_tensors(payload),
+        "headers": {
+            "content-type": TENSOR_CONTENT_TYPE,
+            "accept": f"{TENSOR_CONTENT_TYPE}, application/json",
+            **(kwargs.get("headers") or {}),
+        },
+    }
+
+
+def _decode_tensor_response(resp: httpx.Response) -> Any:  # noqa: ANN401
+    content_type, _, _ = resp.headers.get("content-type", "").partition(";")
+    if content_type.strip() == TENSOR_CONTENT_TYPE:
+        return decode_tensors(resp.content)
+    return resp.json()
+
+
+def _is_event_stream(resp: httpx.Response) -> bool:
+    content_type, _, _ = resp.headers.get("content-type", "").partition(";")
+    return content_type.strip() == EVENT_STREAM_CONTENT_TYPE
+
+
+def _iter_stream(
+    resp: httpx.Response, chunk_size: Optional[int] = None
+) -> Iterator[Union[ServerSentEvent, bytes]]:
+    if _is_event_stream(resp):
+        yield from iter_sse(resp.iter_lines())
+    else:
+        yield from resp.iter_bytes(chunk_size)
+
+
+@dataclass
+class PredictorConnectionStats:
+    """Connection usage counters of a predictor's connection pool."""
+
+    requests: int = 0
+    """Number of requests sent through the pool."""
+
+    connections_opened: int = 0
+    """Number of new TCP connections opened by the pool."""
+
+    @property
+    def connections_reused(self) -> int:
+        """Number of requests that were served over an existing keep-alive connection."""
+        return max(self.requests - self.connections_opened, 0)
+
+
+@dataclass
+class InferenceResult:
+    """Outcome of a single prediction made by `infer_many`."""
+
+    index: int
+    """Position of the payload in the input."""
+
+    payload: Dict[str, Any]
+    """The keyword arguments passed to `infer`."""
+
+    response: Optional[httpx.Response] = None
+
+    error: Optional[Exception] = None
+    """The exception raised by the prediction, if it failed."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _ConnectionTracer:
+    """
+    A `trace` extension callback for httpx/httpcore counting new connections.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats = PredictorConnectionStats()
+
+    def __call__(self, event_name: str, _info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._stats.connections_opened += 1
+
+    def count_request(self) -> None:
+        with self._lock:
+            self._stats.requests += 1
+
+    def snapshot(self) -> PredictorConnectionStats:
+        with self._lock:
+            return PredictorConnectionStats(
+                requests=self._stats.requests,
+                connections_opened=self._stats.connections_opened,
+            )
+
+
 class Predictor(Namespace):
-    def __init__(
+    """
+    A client to get predictions from an endpoint.
+
+    Every predictor owns a keep-alive connection pool which is reused across calls
+    and can be shared across threads. Close it with `close()` or use the predictor as
+    a context manager once it is no longer needed.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         client: Client,
         endpoint: str,
@@ -59,14 +281,179 @@ class Predictor(Namespace):
         # containerType: str,
         # taskType: str,
         healthcheckPath: str,
+        *,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[float] = 5.0,
+        http2: bool = False,
+        timeout: Optional[httpx.Timeout] = None,
+        retry_predictions: bool = False,
+        cache: Optional[PredictionCache] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        balancer: Optional[LoadBalancer] = None,
+        compression: Optional[RequestEncoding] = None,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        controller: Optional[ConcurrencyController] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        singleflight: bool = False,
     ) -> None:
         self.endpoint = endpoint
         self.predictionPath = predictionPath
         self.healthcheckPath = healthcheckPath
+        self.balancer = balancer
+        """Spreads the requests over several base urls, instead of `endpoint`."""
+        self.controller = controller
+        """Adaptive limit of in-flight predictions and circuit breaker, can be shared between predictors."""
+        self.instrumentation = instrumentation or client.instrumentation
+        """Records the timings of every request, defaults to the client's."""
+        self.singleflight = SingleFlight() if singleflight else None
+        """Collapses concurrent identical predictions into one, only enable it for deterministic endpoints."""
+        self.compression = compression
+        """Content encoding of request bodies larger than `compression_threshold` bytes."""
+        self.compression_threshold = compression_threshold
+
+        if http2 and importlib.util.find_spec("h2") is None:
+            raise OutpostError(
+                "HTTP/2 support requires the 'h2' package. Install it with `pip install httpx[http2]`."
+            )
+
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http2 = http2
+        # predictions are POST requests, which the retry transport skips unless asked to.
+        self._retryable_methods = (
+            RetryTransport.RETRYABLE_METHODS | {"POST"} if retry_predictions else None
+        )
+        # predictions can take a long time, do not limit the read by default.
+        self._timeout = timeout or httpx.Timeout(None, connect=10.0, pool=None)
+        self._tracer = _ConnectionTracer()
+        self._http_lock = threading.Lock()
+        self.__http: Optional[httpx.Client] = None
+        self._batcher: Optional[MicroBatcher] = None
+        self.cache = cache
+        """Response cache, only set it for deterministic endpoints."""
+        self.hedger = Hedger(hedging) if hedging else None
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
 
         super().__init__(client)
 
-    def infer(self, **kwargs) -> requests.Response:
+    @property
+    def _http(self) -> httpx.Client:
+        if self.__http is None:
+            with self._http_lock:
+                if self.__http is None:
+                    self.__http = _build_httpx_client(
+                        httpx.Client,
+                        self._client._api_token,
+                        self.endpoint,
+                        self._timeout,
+                        retryable_methods=self._retryable_methods,
+                        transport=PoolMonitorTransport(
+                            httpx.HTTPTransport(limits=self._limits, http2=self._http2),
+                            max_connections=self._limits.max_connections,
+                        ),
+                    )  # type: ignore[assignment]
+        return self.__http  # type: ignore[return-value]
+
+    def _send(
+        self, method: str, path: str, *, controlled: bool = False, **kwargs
+    ) -> httpx.Response:
+        with self._measure(method, path) as tracer, _route(
+            self.balancer, path, self._admit(controlled=controlled)
+        ) as route:
+            resp = self._http.request(
+                method, route.url, **self._prepare(kwargs, tracer)
+            )
+            route.responded(resp)
+            if tracer is not None:
+                tracer.responded(resp)
+            return resp
+
+    @contextlib.contextmanager
+    def _stream(
+        self, method: str, path: str, *, controlled: bool = False, **kwargs
+    ) -> Iterator[httpx.Response]:
+        with self._measure(method, path) as tracer, _route(
+            self.balancer, path, self._admit(controlled=controlled)
+        ) as route, self._http.stream(
+            method, route.url, **self._prepare(kwargs, tracer)
+        ) as resp:
+            route.responded(resp)
+            if tracer is not None:
+                tracer.responded(resp)
+            yield resp
+
+    def _admit(self, *, controlled: bool) -> Optional[ConcurrencyController]:
+        if not controlled or self.controller is None:
+            return None
+        self.controller.acquire()
+        return self.controller
+
+    def _measure(
+        self, method: str, path: str
+    ) -> ContextManager[Optional[RequestTracer]]:
+        return measure(
+            self.instrumentation, self.endpoint, method, path, forward=self._tracer
+        )
+
+    def _prepare(
+        self, kwargs: Dict[str, Any], tracer: Optional[RequestTracer] = None
+    ) -> Dict[str, Any]:
+        self._tracer.count_request()
+        extensions = {
+            "trace": tracer or self._tracer,
+            **(kwargs.pop("extensions", None) or {}),
+        }
+        kwargs = compress_request(kwargs, self.compression, self.compression_threshold)
+        return {**kwargs, "extensions": extensions}
+
+    def check_targets(self) -> Dict[str, bool]:
+        """
+        Healthcheck every load balanced target and eject the unhealthy ones.
+        Returns: the health of each target url.
+        """
+        if self.balancer is None:
+            raise OutpostError("No load balancer configured.")
+        results: Dict[str, bool] = {}
+        for target in self.balancer.targets:
+            try:
+                healthy = self._http.get(
+                    f"{target.url}{self.healthcheckPath}", extensions={"retry": False}
+                ).is_success
+            except httpx.TransportError:
+                healthy = False
+            self.balancer.mark(target.url, healthy=healthy)
+            results[target.url] = healthy
+        return results
+
+    @property
+    def connection_stats(self) -> PredictorConnectionStats:
+        """
+        Connection reuse counters of the predictor's pool.
+        """
+        return self._tracer.snapshot()
+
+    @property
+    def pool_stats(self) -> Optional[PoolStats]:
+        """
+        Saturation of the predictor's pool: connections, requests waiting for one and
+        their wait times.
+        """
+        monitor = find_pool_monitor(self._http)
+        return monitor.stats() if monitor is not None else None
+
+    def warm_up(self, connections: int) -> int:
+        """
+        Open up to `connections` connections to the endpoint ahead of the first predictions,
+        with requests to its healthcheck path.
+        Returns: the number of warm-up requests that got a response.
+        """
+        return warm_up(self._http, connections, self.healthcheckPath)
+
+    def infer(self, **kwargs) -> httpx.Response:
         """Make predictions.
 
         Returns:
@@ -74,38 +461,600 @@ class Predictor(Namespace):
         """
         if self.endpoint is None:
             raise OutpostError("No endpoint configured")
-        added_headers = kwargs.pop("headers", None)
-        resp = requests.post(
-            url=f"{self.endpoint}{self.predictionPath}",
-            headers={
-                "authorization": f"Bearer {str(self._client._api_token)}",
-                **(added_headers if added_headers else {}),
-            },
-            **kwargs,
-        )
+        cache_key = self._cache_key(kwargs)
+        if cache_key is not None:
+            cached = self.cache.get(  # type: ignore[union-attr]
+                cache_key,
+                httpx.Request("POST", f"{self.endpoint}{self.predictionPath}"),
+            )
+            if cached is not None:
+                return cached
+        flight_key = self._singleflight_key("POST", self.predictionPath, kwargs)
+        if flight_key is not None:
+            return self.singleflight.do(  # type: ignore[union-attr]
+                flight_key, lambda: self._infer(kwargs, cache_key)
+            )
+        return self._infer(kwargs, cache_key)
+
+    def _infer(
+        self, kwargs: Dict[str, Any], cache_key: Optional[str]
+    ) -> httpx.Response:
+        if self.hedger is not None:
+            resp = self._hedged_infer(kwargs)
+        else:
+            resp = self._send("POST", self.predictionPath, controlled=True, **kwargs)
+            _raise_for_status(resp=resp)
+        if cache_key is not None:
+            self.cache.set(cache_key, resp)  # type: ignore[union-attr]
+        return resp
+
+    def _timed_infer(self, kwargs: Dict[str, Any]) -> httpx.Response:
+        start = time.monotonic()
+        resp = self._send("POST", self.predictionPath, controlled=True, **kwargs)
         _raise_for_status(resp=resp)
+        self.hedger.observe(time.monotonic() - start)  # type: ignore[union-attr]
         return resp
 
-    def wake(self) -> requests.Response:
+    def _hedged_infer(self, kwargs: Dict[str, Any]) -> httpx.Response:
+        hedger: Hedger = self.hedger  # type: ignore[assignment]
+        if self._hedge_executor is None:
+            with self._http_lock:
+                if self._hedge_executor is None:
+                    # a primary and a hedge per connection of the pool, so that the
+                    # executor does not cap the concurrency of the predictor.
+                    max_connections = self._limits.max_connections or 512
+                    self._hedge_executor = ThreadPoolExecutor(
+                        max_workers=2 * max_connections,
+                        thread_name_prefix="outpost-hedge",
+                    )
+        executor = self._hedge_executor
+
+        primary = executor.submit(self._timed_infer, kwargs)
+        delay = hedger.delay()
+        if delay is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=delay)
+        if done or not hedger.try_hedge():
+            return primary.result()
+
+        hedge = executor.submit(self._timed_infer, kwargs)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    # an in-flight blocking request can not be aborted, drop its response.
+                    for loser in pending:
+                        if not loser.cancel():
+                            loser.add_done_callback(_close_response)
+                    if future is hedge:
+                        hedger.record_hedge_win()
+                    return future.result()
+        raise error  # type: ignore[misc]
+
+    def _singleflight_key(
+        self, method: str, path: str, kwargs: Dict[str, Any]
+    ) -> Optional[str]:
+        if self.singleflight is None:
+            return None
+        return SingleFlight.key_for(method, f"{self.endpoint}{path}", kwargs)
+
+    def _cache_key(self, kwargs: Dict[str, Any]) -> Optional[str]:
+        # multipart uploads and per-call header overrides are not cached.
+        if self.cache is None or "files" in kwargs or "headers" in kwargs:
+            return None
+        return PredictionCache.key_for(self.endpoint, self.predictionPath, kwargs)
+
+    def infer_tensors(self, payload: Any, **kwargs) -> Any:  # noqa: ANN401
+        """Make predictions with numpy arrays sent and received as raw buffers.
+
+        The payload (a JSON-like object that can hold numpy arrays) is encoded with
+        `outpostkit.tensor_codec`, instead of converting the arrays to JSON lists.
+        Returns:
+            The decoded prediction, arrays are numpy views over the response body.
+        """
+        return _decode_tensor_response(self.infer(**_tensor_request(payload, kwargs)))
+
+    def infer_stream(
+        self, chunk_size: Optional[int] = None, **kwargs
+    ) -> Iterator[Union[ServerSentEvent, bytes]]:
+        """Make a prediction and stream the response as it arrives.
+
+        Returns:
+            An iterator of `ServerSentEvent` for `text/event-stream` responses,
+            otherwise of the raw body chunks.
+        """
+        if self.endpoint is None:
+            raise OutpostError("No endpoint configured")
+        with self._stream(
+            "POST", self.predictionPath, controlled=True, **kwargs
+        ) as resp:
+            if resp.is_error:
+                resp.read()
+            _raise_for_status(resp=resp)
+            yield from _iter_stream(resp, chunk_size)
+
+    def wake(self) -> httpx.Response:
         """
         Current deployment status of the endpoint
         """
-        resp = requests.get(
-            url=f"{self.endpoint}{self.predictionPath}",
+        resp = self._send(
+            "GET",
+            self.predictionPath,
             headers={"authorization": str(self._client._api_token)},
+            extensions={"retry": False},
         )
         return resp
 
-    def healthcheck(self) -> requests.Response:
+    def healthcheck(self) -> httpx.Response:
         """
         Current deployment status of the endpoint
         """
         # try:
-        resp = requests.get(
-            url=f"{self.endpoint}{self.healthcheckPath}",
-        )
+        flight_key = self._singleflight_key("GET", self.healthcheckPath, {})
+        if flight_key is not None:
+            return self.singleflight.do(  # type: ignore[union-attr]
+                flight_key,
+                lambda: self._send(
+                    "GET", self.healthcheckPath, extensions={"retry": False}
+                ),
+            )
+        resp = self._send("GET", self.healthcheckPath, extensions={"retry": False})
         return resp
         #     return resp
         #     return "healthy"
         # except Exception:
         #     return "unhealthy"
+
+    def infer_many(
+        self,
+        payloads: Iterable[Dict[str, Any]],
+        concurrency: int = 8,
+        *,
+        ordered: bool = True,
+        max_pending: Optional[int] = None,
+    ) -> Iterator[InferenceResult]:
+        """
+        Make predictions for many payloads in parallel.
+
+        Args:
+            payloads: keyword arguments for `infer`, one per prediction. Consumed lazily.
+            concurrency: number of predictions in flight at once.
+            ordered: yield results in input order instead of completion order.
+            max_pending: cap on in-flight plus finished but not yet yielded results (defaults to 2 * concurrency).
+        Returns:
+            An iterator of `InferenceResult`. Failed predictions are reported through `error` and do not stop the iteration.
+        """
+        max_pending = max(max_pending or 2 * concurrency, concurrency)
+
+        def run(index: int, payload: Dict[str, Any]) -> InferenceResult:
+            try:
+                return InferenceResult(index, payload, response=self.infer(**payload))
+            except Exception as e:  # noqa: BLE001
+                return InferenceResult(index, payload, error=e)
+
+        items = enumerate(payloads)
+        with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="outpost-infer"
+        ) as executor:
+            if ordered:
+                queued: Deque[Future[InferenceResult]] = deque()
+                for index, payload in items:
+                    queued.append(executor.submit(run, index, payload))
+                    if len(queued) >= max_pending:
+                        yield queued.popleft().result()
+                while queued:
+                    yield queued.popleft().result()
+            else:
+                running: Set[Future[InferenceResult]] = set()
+                for index, payload in items:
+                    running.add(executor.submit(run, index, payload))
+                    if len(running) >= concurrency:
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+                for future in as_completed(running):
+                    yield future.result()
+
+    def enable_batching(  # pylint: disable=too-many-arguments
+        self,
+        merge: Callable[[List[Any]], Dict[str, Any]],
+        split: Callable[[httpx.Response, List[Any]], Sequence[Any]],
+        *,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        max_concurrent_batches: int = 4,
+    ) -> None:
+        """
+        Batch concurrent `infer_batched` calls into a single prediction request.
+
+        Args:
+            merge: builds the `infer` keyword arguments (eg. `{"json": ...}`) for a list of items.
+            split: splits the prediction response into one result per item, in order.
+            max_batch_size: maximum number of items sent in one request.
+            max_wait: seconds to wait for more items after the first item of a batch arrives.
+            max_concurrent_batches: number of batch requests that can be in flight at once.
+        """
+        if self._batcher is not None:
+            self._batcher.close()
+
+        def send(items: List[Any]) -> Sequence[Any]:
+            return split(self.infer(**merge(items)), items)
+
+        self._batcher = MicroBatcher(
+            send,
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+            max_concurrent_batches=max_concurrent_batches,
+        )
+
+    def submit(self, item: Any) -> "Future[Any]":  # noqa: ANN401
+        """
+        Queue a single item for the next batched prediction request.
+        Returns: a future resolving to the item's result.
+        """
+        if self._batcher is None:
+            raise OutpostError("Batching is not enabled. Call `enable_batching` first.")
+        return self._batcher.submit(item)
+
+    def infer_batched(self, item: Any, timeout: Optional[float] = None) -> Any:  # noqa: ANN401
+        """
+        Get the prediction for a single item, sent together with concurrent calls.
+        """
+        return self.submit(item).result(timeout=timeout)
+
+    def close(self) -> None:
+        """
+        Close the connection pool of the predictor.
+        """
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=True)
+            self._hedge_executor = None
+        if self.__http is not None:
+            self.__http.close()
+            self.__http = None
+
+    def __enter__(self) -> "Predictor":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class AsyncPredictor(Namespace):
+    """
+    An asyncio client to get predictions from an endpoint.
+
+    Requests are sent through the client's shared `httpx.AsyncClient` pool and the
+    number of in-flight predictions is capped by `max_concurrency`.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        client: Client,
+        endpoint: str,
+        predictionPath: str,
+        healthcheckPath: str,
+        *,
+        max_concurrency: int = 100,
+        timeout: Optional[httpx.Timeout] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        balancer: Optional[LoadBalancer] = None,
+        compression: Optional[RequestEncoding] = None,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        controller: Optional[ConcurrencyController] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        singleflight: bool = False,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency should be at least 1, actual {max_concurrency}"
+            )
+        self.endpoint = endpoint
+        self.predictionPath = predictionPath
+        self.healthcheckPath = healthcheckPath
+        self.balancer = balancer
+        """Spreads the requests over several base urls, instead of `endpoint`."""
+        self.controller = controller
+        """Adaptive limit of in-flight predictions and circuit breaker, can be shared between predictors."""
+        self.instrumentation = instrumentation or client.instrumentation
+        """Records the timings of every request, defaults to the client's."""
+        self.singleflight = SingleFlight() if singleflight else None
+        """Collapses concurrent identical predictions into one, only enable it for deterministic endpoints."""
+        self.compression = compression
+        """Content encoding of request bodies larger than `compression_threshold` bytes."""
+        self.compression_threshold = compression_threshold
+        self.max_concurrency = max_concurrency
+        self._timeout = timeout or httpx.Timeout(None, connect=10.0, pool=None)
+        # created lazily so that it binds to the running event loop.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.hedger = Hedger(hedging) if hedging else None
+
+        super().__init__(client)
+
+    @property
+    def _limiter(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _measure(
+        self, method: str, path: str
+    ) -> ContextManager[Optional[RequestTracer]]:
+        return measure(self.instrumentation, self.endpoint, method, path)
+
+    def _prepare(
+        self, kwargs: Dict[str, Any], tracer: Optional[RequestTracer] = None
+    ) -> Dict[str, Any]:
+        kwargs.setdefault("timeout", self._timeout)
+        kwargs = traced(kwargs, tracer, asynchronous=True)
+        return compress_request(kwargs, self.compression, self.compression_threshold)
+
+    async def _send(
+        self, method: str, path: str, *, controlled: bool = False, **kwargs
+    ) -> httpx.Response:
+        with self._measure(method, path) as tracer:
+            kwargs = self._prepare(kwargs, tracer)
+            async with self._limiter:
+                with _route(
+                    self.balancer, path, await self._admit(controlled=controlled)
+                ) as route:
+                    resp = await self._client._async_client.request(
+                        method, self._url(route.url), **kwargs
+                    )
+                    route.responded(resp)
+                    if tracer is not None:
+                        tracer.responded(resp)
+                    return resp
+
+    async def _admit(self, *, controlled: bool) -> Optional[ConcurrencyController]:
+        if not controlled or self.controller is None:
+            return None
+        await self.controller.aacquire()
+        return self.controller
+
+    def _url(self, route_url: str) -> str:
+        # balanced routes are already absolute.
+        return route_url if self.balancer else f"{self.endpoint}{route_url}"
+
+    async def acheck_targets(self) -> Dict[str, bool]:
+        """
+        Healthcheck every load balanced target and eject the unhealthy ones.
+        Returns: the health of each target url.
+        """
+        if self.balancer is None:
+            raise OutpostError("No load balancer configured.")
+        balancer = self.balancer
+
+        async def check(url: str) -> bool:
+            try:
+                resp = await self._client._async_client.get(
+                    f"{url}{self.healthcheckPath}",
+                    timeout=self._timeout,
+                    extensions={"retry": False},
+                )
+                healthy = resp.is_success
+            except httpx.TransportError:
+                healthy = False
+            balancer.mark(url, healthy=healthy)
+            return healthy
+
+        urls = [target.url for target in balancer.targets]
+        return dict(zip(urls, await asyncio.gather(*[check(url) for url in urls])))
+
+    async def ainfer(self, **kwargs) -> httpx.Response:
+        """Make predictions.
+
+        Returns:
+            The prediction.
+        """
+        if self.endpoint is None:
+            raise OutpostError("No endpoint configured")
+        flight_key = self._singleflight_key("POST", self.predictionPath, kwargs)
+        if flight_key is not None:
+            return await self.singleflight.ado(  # type: ignore[union-attr]
+                flight_key, lambda: self._infer(kwargs)
+            )
+        return await self._infer(kwargs)
+
+    async def _infer(self, kwargs: Dict[str, Any]) -> httpx.Response:
+        if self.hedger is not None:
+            return await self._hedged_infer(kwargs)
+        resp = await self._send("POST", self.predictionPath, controlled=True, **kwargs)
+        _raise_for_status(resp=resp)
+        return resp
+
+    def _singleflight_key(
+        self, method: str, path: str, kwargs: Dict[str, Any]
+    ) -> Optional[str]:
+        if self.singleflight is None:
+            return None
+        return SingleFlight.key_for(method, f"{self.endpoint}{path}", kwargs)
+
+    async def _timed_infer(self, kwargs: Dict[str, Any]) -> httpx.Response:
+        start = time.monotonic()
+        resp = await self._send("POST", self.predictionPath, controlled=True, **kwargs)
+        _raise_for_status(resp=resp)
+        self.hedger.observe(time.monotonic() - start)  # type: ignore[union-attr]
+        return resp
+
+    async def _hedged_infer(self, kwargs: Dict[str, Any]) -> httpx.Response:
+        hedger: Hedger = self.hedger  # type: ignore[assignment]
+        primary = asyncio.ensure_future(self._timed_infer(kwargs))
+        delay = hedger.delay()
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done or not hedger.try_hedge():
+            return await primary
+
+        hedge = asyncio.ensure_future(self._timed_infer(kwargs))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        if task is hedge:
+                            hedger.record_hedge_win()
+                        return task.result()
+            raise error  # type: ignore[misc]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def ainfer_tensors(self, payload: Any, **kwargs) -> Any:  # noqa: ANN401
+        """Make predictions with numpy arrays sent and received as raw buffers.
+        See `Predictor.infer_tensors`.
+        """
+        return _decode_tensor_response(
+            await self.ainfer(**_tensor_request(payload, kwargs))
+        )
+
+    async def ainfer_stream(
+        self, chunk_size: Optional[int] = None, **kwargs
+    ) -> AsyncIterator[Union[ServerSentEvent, bytes]]:
+        """Make a prediction and stream the response as it arrives.
+
+        Returns:
+            An async iterator of `ServerSentEvent` for `text/event-stream` responses,
+            otherwise of the raw body chunks.
+        """
+        if self.endpoint is None:
+            raise OutpostError("No endpoint configured")
+        with self._measure("POST", self.predictionPath) as tracer:
+            kwargs = self._prepare(kwargs, tracer)
+            async with self._limiter:
+                with _route(
+                    self.balancer,
+                    self.predictionPath,
+                    await self._admit(controlled=True),
+                ) as route:
+                    async with self._client._async_client.stream(
+                        "POST", self._url(route.url), **kwargs
+                    ) as resp:
+                        route.responded(resp)
+                        if tracer is not None:
+                            tracer.responded(resp)
+                        if resp.is_error:
+                            await resp.aread()
+                        _raise_for_status(resp=resp)
+                        if _is_event_stream(resp):
+                            async for sse in aiter_sse(resp.aiter_lines()):
+                                yield sse
+                        else:
+                            async for chunk in resp.aiter_bytes(chunk_size):
+                                yield chunk
+
+    async def ainfer_many(
+        self,
+        payloads: Union[Iterable[Dict[str, Any]], AsyncIterator[Dict[str, Any]]],
+        concurrency: Optional[int] = None,
+        *,
+        ordered: bool = True,
+        max_pending: Optional[int] = None,
+    ) -> AsyncIterator[InferenceResult]:
+        """
+        Make predictions for many payloads concurrently.
+
+        Args:
+            payloads: keyword arguments for `ainfer`, one per prediction. Consumed lazily.
+            concurrency: number of predictions in flight at once (defaults to `max_concurrency`).
+            ordered: yield results in input order instead of completion order.
+            max_pending: cap on in-flight plus finished but not yet yielded results (defaults to 2 * concurrency).
+        Returns:
+            An async iterator of `InferenceResult`. Failed predictions are reported through `error` and do not stop the iteration.
+        """
+        concurrency = concurrency or self.max_concurrency
+        max_pending = max(max_pending or 2 * concurrency, concurrency)
+        limiter = asyncio.Semaphore(concurrency)
+
+        async def run(index: int, payload: Dict[str, Any]) -> InferenceResult:
+            async with limiter:
+                try:
+                    return InferenceResult(
+                        index, payload, response=await self.ainfer(**payload)
+                    )
+                except Exception as e:  # noqa: BLE001
+                    return InferenceResult(index, payload, error=e)
+
+        async def items() -> AsyncIterator[Dict[str, Any]]:
+            if isinstance(payloads, AsyncIterator):
+                async for payload in payloads:
+                    yield payload
+            else:
+                for payload in payloads:
+                    yield payload
+
+        index = 0
+        queued: Deque[asyncio.Task] = deque()
+        running: Set[asyncio.Task] = set()
+        try:
+            async for payload in items():
+                task = asyncio.ensure_future(run(index, payload))
+                index += 1
+                if ordered:
+                    queued.append(task)
+                    if len(queued) >= max_pending:
+                        yield await queued.popleft()
+                else:
+                    running.add(task)
+                    if len(running) >= concurrency:
+                        done, running = await asyncio.wait(
+                            running, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        for finished in done:
+                            yield finished.result()
+            while queued:
+                yield await queued.popleft()
+            for finished in asyncio.as_completed(running):
+                yield await finished
+        finally:
+            for task in (*queued, *running):
+                task.cancel()
+
+    async def ahealthcheck(self) -> httpx.Response:
+        """
+        Current deployment status of the endpoint
+        """
+        flight_key = self._singleflight_key("GET", self.healthcheckPath, {})
+        if flight_key is not None:
+            return await self.singleflight.ado(  # type: ignore[union-attr]
+                flight_key,
+                lambda: self._send(
+                    "GET", self.healthcheckPath, extensions={"retry": False}
+                ),
+            )
+        return await self._send(
+            "GET", self.healthcheckPath, extensions={"retry": False}
+        )
+
+    async def await_ready(
+        self, timeout: Optional[float] = None, interval: Optional[float] = None
+    ) -> None:
+        """
+        Wait until the healthcheck path of the endpoint responds successfully.
+        Raises `OutpostError` if the endpoint is not ready within `timeout` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        interval = interval or self._client.poll_interval
+        while True:
+            try:
+                resp = await self.ahealthcheck()
+                if resp.is_success:
+                    return
+            except httpx.TransportError:
+                pass
+            if deadline is not None and loop.time() + interval > deadline:
+                raise OutpostError(f"Endpoint not ready after {timeout} seconds.")
+            await asyncio.sleep(interval)
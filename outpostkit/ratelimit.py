@@ -0,0 +1,277 @@
+import asyncio
+import fnmatch
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import httpx
+
+try:
+    import fcntl
+
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+# tokens, updated at, rate, blocked until
+_BucketState = List[float]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a `Retry-After` header, in seconds or as a date."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    for parse in (parsedate_to_datetime, datetime.fromisoformat):
+        try:
+            diff = (
+                parse(value).astimezone() - datetime.now().astimezone()
+            ).total_seconds()
+            return max(diff, 0)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _header_number(headers: Mapping[str, str], *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value.split(",")[0].strip())
+            except ValueError:
+                return None
+    return None
+
+
+class _MemoryStore:
+    def __init__(self) -> None:
+        self._state: Dict[str, _BucketState] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, _BucketState]]:
+        with self._lock:
+            yield self._state
+
+
+class _FileStore:
+    """Bucket states in a JSON file, locked with `flock` so that processes share them."""
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, _BucketState]]:
+        with self._lock, open(
+            os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), "r+", encoding="utf-8"
+        ) as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                content = f.read()
+                try:
+                    state = json.loads(content) if content else {}
+                except ValueError:
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """
+    Client-side token buckets throttling requests before the server does.
+
+    Every request takes a token from the global bucket (`rate` per second, bursts of
+    `burst`) and from the buckets of the `routes` it matches. Routes are `fnmatch`
+    patterns of `"<METHOD> <path>"`, eg. `{"GET */logs": (1, 5)}` for one request a
+    second with bursts of 5.
+
+    Buckets follow the `Retry-After` and `RateLimit-*`/`X-RateLimit-*` headers of the
+    responses. With `path`, the buckets are kept in a lock file shared by the
+    processes of the host (POSIX only), otherwise they are shared by threads.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10,
+        burst: float = 20,
+        *,
+        routes: Optional[Dict[str, Tuple[float, float]]] = None,
+        path: Optional[str] = None,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate should be positive, actual {rate}")
+        self._limits: Dict[str, Tuple[float, float]] = {"*": (rate, burst)}
+        for pattern, (route_rate, route_burst) in (routes or {}).items():
+            if route_rate <= 0:
+                raise ValueError(
+                    f"rate of {pattern} should be positive, actual {route_rate}"
+                )
+            self._limits[f"route:{pattern}"] = (route_rate, route_burst)
+        if path is not None and not HAS_FCNTL:
+            raise ValueError(
+                "Sharing a rate limiter between processes is not supported on this platform."
+            )
+        self._store: Union[_MemoryStore, _FileStore] = (
+            _FileStore(path) if path else _MemoryStore()
+        )
+
+    def _buckets(self, method: str, path: str) -> List[str]:
+        route = f"{method} {path}"
+        return ["*"] + [
+            name
+            for name in self._limits
+            if name.startswith("route:") and fnmatch.fnmatchcase(route, name[6:])
+        ]
+
+    def _bucket(
+        self, state: Dict[str, _BucketState], name: str, now: float
+    ) -> _BucketState:
+        configured_rate, burst = self._limits[name]
+        bucket = state.get(name)
+        if bucket is None:
+            bucket = state[name] = [burst, now, configured_rate, 0.0]
+        tokens, updated, rate, _ = bucket
+        bucket[0] = min(tokens + max(now - updated, 0) * rate, burst)
+        bucket[1] = now
+        return bucket
+
+    def reserve(self, method: str, path: str) -> float:
+        """Take a token for a request. Returns: seconds to wait before sending it."""
+        now = time.time()
+        wait = 0.0
+        with self._store.transaction() as state:
+            for name in self._buckets(method, path):
+                bucket = self._bucket(state, name, now)
+                bucket[0] -= 1
+                tokens, _, rate, blocked_until = bucket
+                wait = max(
+                    wait, -tokens / rate if tokens < 0 else 0, blocked_until - now
+                )
+        return wait
+
+    def acquire(self, method: str, path: str) -> None:
+        time.sleep(self.reserve(method, path))
+
+    async def aacquire(self, method: str, path: str) -> None:
+        await asyncio.sleep(self.reserve(method, path))
+
+    def observe(
+        self, method: str, path: str, status_code: int, headers: Mapping[str, str]
+    ) -> None:
+        """Adapt the buckets of a route to the rate limit headers of its response."""
+        retry_after = (
+            parse_retry_after(headers.get("retry-after"))
+            if status_code in (429, 503)
+            else None
+        )
+        remaining = _header_number(
+            headers, "ratelimit-remaining", "x-ratelimit-remaining"
+        )
+        reset = _header_number(headers, "ratelimit-reset", "x-ratelimit-reset")
+        if reset is not None and reset > 1e9:
+            # an epoch timestamp rather than seconds.
+            reset = max(reset - time.time(), 0)
+        if retry_after is None and remaining is None:
+            return
+
+        names = self._buckets(method, path)
+        # throttling most likely applies to the most specific bucket.
+        names = names[1:] or names
+        now = time.time()
+        with self._store.transaction() as state:
+            for name in names:
+                bucket = self._bucket(state, name, now)
+                configured_rate, _ = self._limits[name]
+                if retry_after is not None:
+                    bucket[3] = max(bucket[3], now + retry_after)
+                if remaining is not None:
+                    bucket[0] = min(bucket[0], remaining)
+                    if remaining < 1 and reset:
+                        bucket[3] = max(bucket[3], now + reset)
+                    bucket[2] = (
+                        min(
+                            configured_rate,
+                            max(remaining / reset, configured_rate / 100),
+                        )
+                        if reset
+                        else configured_rate
+                    )
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Current state of the buckets, keyed by `*` or `route:<pattern>`."""
+        now = time.time()
+        with self._store.transaction() as state:
+            return {
+                name: {
+                    "tokens": bucket[0],
+                    "rate": bucket[2],
+                    "blocked_for": max(bucket[3] - now, 0),
+                }
+                for name, bucket in (
+                    (name, self._bucket(state, name, now)) for name in self._limits
+                )
+            }
+
+
+class RateLimitTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """
+    A transport waiting for a `RateLimiter` before every request to `origin`.
+    Requests to other hosts (eg. predictions) are not limited.
+    """
+
+    def __init__(
+        self,
+        wrapped_transport: Union[httpx.BaseTransport, httpx.AsyncBaseTransport],
+        limiter: RateLimiter,
+        origin: Union[str, httpx.URL],
+    ) -> None:
+        self._wrapped_transport = wrapped_transport
+        self.limiter = limiter
+        origin = httpx.URL(origin)
+        self._origin = (origin.scheme, origin.host, origin.port)
+
+    def _limited(self, request: httpx.Request) -> bool:
+        return (request.url.scheme, request.url.host, request.url.port) == self._origin
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._limited(request):
+            return self._wrapped_transport.handle_request(request)  # type: ignore
+        self.limiter.acquire(request.method, request.url.path)
+        response = self._wrapped_transport.handle_request(request)  # type: ignore
+        self.limiter.observe(
+            request.method, request.url.path, response.status_code, response.headers
+        )
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._limited(request):
+            return await self._wrapped_transport.handle_async_request(request)  # type: ignore
+        await self.limiter.aacquire(request.method, request.url.path)
+        response = await self._wrapped_transport.handle_async_request(request)  # type: ignore
+        self.limiter.observe(
+            request.method, request.url.path, response.status_code, response.headers
+        )
+        return response
+
+    async def aclose(self) -> None:
+        await self._wrapped_transport.aclose()  # type: ignore
+
+    def close(self) -> None:
+        self._wrapped_transport.close()  # type: ignore
@@ -1,7 +1,11 @@
-"""A simple Git LFS client
-"""
+"""A simple Git LFS client"""
+
 import hashlib
-from typing import Any, BinaryIO, Callable, Dict, List, Optional
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Mapping, Optional, Sequence
 
 import requests
 from six.moves import urllib_parse
@@ -9,9 +13,13 @@ from six.moves import urllib_parse
 from outpostkit.repository.lfs.logger import create_lfs_logger
 
 from . import exc, transfer, types
+from .hashindex import FileHashIndex, hash_files
 
 FILE_READ_BUFFER_SIZE = 4 * 1024 * 1000  # 4mb, why not
 
+DEFAULT_BATCH_SIZE = 100
+"""Objects per batch request of `upload_many`/`download_many`, as git-lfs does."""
+
 
 _log = create_lfs_logger(__name__)
 
@@ -31,10 +39,24 @@ class LfsClient:
         lfs_server_url: str,
         auth_token: Optional[str] = None,
         transfer_adapters: List[str] = TRANSFER_ADAPTER_PRIORITY,
+        hash_index: Optional[FileHashIndex] = None,
+        hash_workers: Optional[int] = None,
     ) -> None:
+        """
+        Args:
+            hash_index: oids of the files already hashed, so that unchanged files are not hashed again. Kept in memory unless the `OUTPOST_LFS_HASH_INDEX` environment variable names a file.
+            hash_workers: threads hashing the files of `upload_many`, defaults to the number of CPUs.
+        """
         self._url = lfs_server_url.rstrip("/")
         self._auth_token = auth_token
         self._transfer_adapters = transfer_adapters
+        self.hash_index = hash_index or FileHashIndex(
+            path=os.environ.get("OUTPOST_LFS_HASH_INDEX")
+        )
+        self._hash_workers = hash_workers
+        # adapters are shared by the transfers, to reuse their connections.
+        self._adapters: Dict[str, transfer.BasicTransferAdapter] = {}
+        self._adapters_lock = threading.Lock()
 
     def batch(
         self,
@@ -45,10 +67,7 @@ class LfsClient:
         transfers: Optional[List[str]] = None,
     ):
         # type: (str, str, List[Dict[str, Any]], Optional[str], Optional[List[str]]) -> Dict[str, Any]
-        """Send a batch request to the LFS server
-
-        TODO: allow specifying more than one file for a single batch operation
-        """
+        """Send a batch request to the LFS server"""
         url = self._url_for(prefix, "objects", "batch")
         if transfers is None:
             transfers = self._transfer_adapters
@@ -80,22 +99,184 @@ class LfsClient:
         **extras,
     ) -> types.ObjectAttributes:
         """Upload a file to LFS storage"""
-        object_attrs = self._get_object_attrs(file_obj)
+        object_attrs = self._get_indexed_object_attrs(file_obj)
         self._add_extra_object_attributes(object_attrs, extras)
         response = self.batch(
             f"{organization}/{repo_type}/{repo}", "upload", [object_attrs]
         )
 
-        try:
-            adapter = self.TRANSFER_ADAPTERS[response["transfer"]]()
-        except KeyError:
-            raise ValueError(
-                "Unsupported transfer adapter: {}".format(response["transfer"])
-            )
-
+        adapter = self._adapter(response.get("transfer"))
         adapter.upload(file_obj, response["objects"][0], on_progress)
         return object_attrs
 
+    def upload_many(
+        self,
+        paths: Sequence[str],
+        organization: str,
+        repo_type: str,
+        repo: str,
+        on_progress: Optional[Callable[[int], None]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_workers: int = 4,
+        **extras,
+    ) -> List[types.ObjectAttributes]:
+        """Upload many files to LFS storage, with one batch request per `batch_size` objects.
+
+        Objects the server already has are skipped. Up to `max_workers` objects are
+        transferred at once, while the next batches are requested. Files unchanged
+        since they were last hashed are not read, see `FileHashIndex`.
+        Returns: the object attributes of every path, in order.
+        """
+        attrs = hash_files(paths, self.hash_index, self._hash_workers)
+        objects: List[types.ObjectAttributes] = []
+        paths_by_oid: Dict[str, str] = {}
+        for path, object_attrs in zip(paths, attrs):
+            if object_attrs["oid"] not in paths_by_oid:
+                paths_by_oid[object_attrs["oid"]] = path
+                objects.append(types.ObjectAttributes(**object_attrs))
+                self._add_extra_object_attributes(objects[-1], extras)
+
+        def upload(
+            adapter: transfer.BasicTransferAdapter,
+            spec: Dict[str, Any],
+            report: Optional[Callable[[int], None]],
+        ) -> None:
+            with open(paths_by_oid[spec["oid"]], "rb") as file_obj:
+                adapter.upload(file_obj, spec, report)  # type: ignore[arg-type]
+
+        self._transfer_many(
+            f"{organization}/{repo_type}/{repo}",
+            "upload",
+            objects,
+            upload,
+            on_progress,
+            batch_size,
+            max_workers,
+        )
+        return attrs
+
+    def download_many(
+        self,
+        objects: Mapping[str, types.ObjectAttributes],
+        organization: str,
+        repo_type: str,
+        repo: str,
+        on_progress: Optional[Callable[[int], None]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_workers: int = 4,
+        **extras,
+    ) -> None:
+        """Download many objects, given as a mapping of destination path to object attributes.
+
+        One batch request is sent per `batch_size` objects and up to `max_workers`
+        objects are transferred at once. Interrupted downloads of large objects resume.
+        """
+        paths_by_oid: Dict[str, List[str]] = {}
+        for path, object_attrs in objects.items():
+            paths_by_oid.setdefault(object_attrs["oid"], []).append(path)
+
+        def download(
+            adapter: transfer.BasicTransferAdapter,
+            spec: Dict[str, Any],
+            report: Optional[Callable[[int], None]],
+        ) -> None:
+            first, *copies = paths_by_oid[spec["oid"]]
+            directory = os.path.dirname(first)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            adapter.download_file(first, spec, report)  # type: ignore[arg-type]
+            for path in copies:
+                shutil.copyfile(first, path)
+
+        unique = []
+        for path in (paths[0] for paths in paths_by_oid.values()):
+            object_attrs = types.ObjectAttributes(
+                oid=objects[path]["oid"], size=objects[path]["size"]
+            )
+            self._add_extra_object_attributes(object_attrs, extras)
+            unique.append(object_attrs)
+        self._transfer_many(
+            f"{organization}/{repo_type}/{repo}",
+            "download",
+            unique,
+            download,
+            on_progress,
+            batch_size,
+            max_workers,
+        )
+
+    def _transfer_many(  # pylint: disable=too-many-arguments,too-many-locals
+        self,
+        prefix: str,
+        operation: str,
+        objects: List[types.ObjectAttributes],
+        transfer_object: Callable[
+            [
+                transfer.BasicTransferAdapter,
+                Dict[str, Any],
+                Optional[Callable[[int], None]],
+            ],
+            None,
+        ],
+        on_progress: Optional[Callable[[int], None]],
+        batch_size: int,
+        max_workers: int,
+    ) -> None:
+        """Send the batch requests of `objects` and schedule their transfers on a shared pool."""
+        report = None
+        if on_progress is not None:
+            progress_lock = threading.Lock()
+
+            def report(size: int) -> None:
+                with progress_lock:
+                    on_progress(size)  # type: ignore[misc]
+
+        errors: List[str] = []
+        futures: List[Future[None]] = []
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"lfs-{operation}"
+        ) as executor:
+            for start in range(0, len(objects), batch_size):
+                response = self.batch(
+                    prefix,
+                    operation,
+                    objects[start : start + batch_size],  # type: ignore[arg-type]
+                )
+                adapter = self._adapter(response.get("transfer"))
+                for spec in response.get("objects", []):
+                    if spec.get("error"):
+                        errors.append(
+                            f"{spec.get('oid')}: {spec['error'].get('message')}"
+                        )
+                    elif not spec.get("actions") and operation == "upload":
+                        # the server already has the object.
+                        _log.debug("Skipping %s, nothing to transfer", spec.get("oid"))
+                    elif not spec.get("actions"):
+                        errors.append(f"{spec.get('oid')}: no {operation} action")
+                    else:
+                        futures.append(
+                            executor.submit(transfer_object, adapter, spec, report)
+                        )
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:  # noqa: BLE001
+                    errors.append(str(e))
+        if errors:
+            raise exc.LfsError(
+                f"{len(errors)} of {len(objects)} objects failed to {operation}: {'; '.join(errors[:5])}"
+            )
+
+    def _adapter(self, name: Optional[str]) -> transfer.BasicTransferAdapter:
+        with self._adapters_lock:
+            adapter = self._adapters.get(name)  # type: ignore[arg-type]
+            if adapter is None:
+                try:
+                    adapter = self._adapters[name] = self.TRANSFER_ADAPTERS[name]()  # type: ignore[index]
+                except KeyError:
+                    raise ValueError(f"Unsupported transfer adapter: {name}") from None
+            return adapter
+
     def download(
         self,
         file_obj: BinaryIO,
@@ -108,9 +289,8 @@ class LfsClient:
     ) -> None:
         """Download a file and save it to file_obj
 
-        file_obj is expected to be an file-like object open for writing in binary mode
-
-        TODO: allow specifying more than one file for a single batch operation
+        file_obj is expected to be an file-like object open for writing in binary mode.
+        Use `download_many` for many objects.
         """
         object_attrs = {"oid": object_sha256, "size": object_size}
         self._add_extra_object_attributes(object_attrs, extras)
@@ -119,13 +299,7 @@ class LfsClient:
             f"{organization}/{repo_type}/{repo}", "download", [object_attrs]
         )
 
-        try:
-            adapter = self.TRANSFER_ADAPTERS[response["transfer"]]()
-        except KeyError:
-            raise ValueError(
-                "Unsupported transfer adapter: {}".format(response["transfer"])
-            )
-
+        adapter = self._adapter(response.get("transfer"))
         return adapter.download(file_obj, response["objects"][0])
 
     def _url_for(self, *segments: str, **params: str):
@@ -135,6 +309,23 @@ class LfsClient:
             url = f"{url}?{urllib_parse.urlencode(params)}"
         return url
 
+    def _get_indexed_object_attrs(self, file_obj: BinaryIO) -> types.ObjectAttributes:
+        """`_get_object_attrs`, from the hash index for unchanged files opened by path."""
+        path = getattr(file_obj, "name", None)
+        if not isinstance(path, str) or not os.path.isfile(path) or file_obj.tell():
+            return self._get_object_attrs(file_obj)
+        st = os.stat(path)
+        oid = self.hash_index.get(path, st)
+        if oid is not None:
+            return types.ObjectAttributes(oid=oid, size=st.st_size)  # type: ignore[typeddict-item]
+        object_attrs = self._get_object_attrs(file_obj)
+        if (object_attrs["size"], os.stat(path).st_mtime_ns) == (
+            st.st_size,
+            st.st_mtime_ns,
+        ):
+            self.hash_index.set(path, st, object_attrs["oid"])
+        return object_attrs
+
     @staticmethod
     def _get_object_attrs(file_obj: BinaryIO, **extras) -> types.ObjectAttributes:
         digest = hashlib.sha256()
@@ -0,0 +1,125 @@
+"""A persistent index of the LFS oids of local files"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from outpostkit.cache import DiskCache, LRUCache
+
+from . import types
+
+HASH_READ_BUFFER_SIZE = 4 * 1024 * 1024
+
+PARALLEL_HASH_THRESHOLD = 64 * 1024 * 1024
+"""Below this many bytes to hash, files are hashed one after the other."""
+
+# files modified this recently could change again within the same mtime, do not index them.
+_RACY_WINDOW_NS = 2 * 10**9
+
+
+class FileHashIndex:
+    """
+    SHA-256 oids of files keyed by (path, inode, size, mtime_ns), so that unchanged
+    files are not hashed again.
+
+    Entries are kept in memory and, when `path` is given, in an on-disk sqlite store
+    shared by processes. They expire after `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = 30 * 24 * 3600,
+        max_entries: int = 100_000,
+    ) -> None:
+        self._memory: LRUCache[str] = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._disk = DiskCache(path, ttl=ttl) if path else None
+
+    @staticmethod
+    def _key(path: str, st: os.stat_result) -> str:
+        return f"{os.path.abspath(path)}|{st.st_ino}|{st.st_size}|{st.st_mtime_ns}"
+
+    def get(self, path: str, st: os.stat_result) -> Optional[str]:
+        key = self._key(path, st)
+        oid = self._memory.get(key)
+        if oid is None and self._disk is not None:
+            raw = self._disk.get(key)
+            if raw is not None:
+                oid = raw.decode("ascii")
+                self._memory.set(key, oid)
+        return oid
+
+    def set(self, path: str, st: os.stat_result, oid: str) -> None:
+        if time.time_ns() - st.st_mtime_ns < _RACY_WINDOW_NS:
+            return
+        key = self._key(path, st)
+        self._memory.set(key, oid)
+        if self._disk is not None:
+            self._disk.set(key, oid.encode("ascii"))
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+
+def hash_file(path: str) -> Tuple[str, int]:
+    """Returns: the SHA-256 hex digest and size of a file."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(HASH_READ_BUFFER_SIZE), b""):
+            digest.update(data)
+            size += len(data)
+    return digest.hexdigest(), size
+
+
+def hash_files(
+    paths: Sequence[str],
+    index: Optional[FileHashIndex] = None,
+    max_workers: Optional[int] = None,
+) -> List[types.ObjectAttributes]:
+    """
+    Object attributes of files, in order. Files found unchanged in `index` are not
+    read; the others are hashed by up to `max_workers` threads (one per CPU by
+    default) when there is enough to hash, and added to the index. `hashlib` and
+    file reads release the GIL, so the threads hash in parallel.
+    """
+    stats = [os.stat(path) for path in paths]
+    attrs: List[Optional[Tuple[str, int]]] = [None] * len(paths)
+    if index is not None:
+        for i, (path, st) in enumerate(zip(paths, stats)):
+            oid = index.get(path, st)
+            if oid is not None:
+                attrs[i] = (oid, st.st_size)
+    missing = [i for i, found in enumerate(attrs) if found is None]
+    missing_paths = [paths[i] for i in missing]
+    if (
+        len(missing) > 1
+        and max_workers != 1
+        and sum(stats[i].st_size for i in missing) >= PARALLEL_HASH_THRESHOLD
+    ):
+        with ThreadPoolExecutor(
+            max_workers=max_workers or os.cpu_count() or 1,
+            thread_name_prefix="lfs-hash",
+        ) as executor:
+            hashed = list(executor.map(hash_file, missing_paths))
+    else:
+        hashed = [hash_file(path) for path in missing_paths]
+
+    for i, (oid, size) in zip(missing, hashed):
+        # the size is the one of the hashed bytes, even if the file changed since `stat`.
+        attrs[i] = (oid, size)
+        if index is not None:
+            st = os.stat(paths[i])
+            # only index the file if it did not change while it was hashed.
+            if size == st.st_size and FileHashIndex._key(
+                paths[i], st
+            ) == FileHashIndex._key(paths[i], stats[i]):
+                index.set(paths[i], st, oid)
+    return [
+        types.ObjectAttributes(oid=oid, size=size)  # type: ignore[typeddict-item]
+        for oid, size in attrs  # type: ignore[misc]
+    ]
@@ -1,6 +1,13 @@
 import base64
 import hashlib
-from typing import Any, BinaryIO, Callable, Dict, Optional, Union
+import io
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Set, Union
 
 import requests
 
@@ -11,7 +18,31 @@ from . import types
 _log = create_lfs_logger(__name__)
 
 
+DOWNLOAD_PART_SIZE = 64 * 1024 * 1024
+"""Size of the ranges large objects are downloaded in."""
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
 class BasicTransferAdapter:
+    """
+    Objects of at least two `download_part_size` parts are downloaded with parallel
+    HTTP Range requests, from up to `max_workers` threads. Failed transfers are
+    retried `max_retries` times.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        max_retries: int = 3,
+        download_part_size: int = DOWNLOAD_PART_SIZE,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.download_part_size = download_part_size
+        # requests sessions are not thread-safe, every worker keeps its own.
+        self._local = threading.local()
+
     def upload(
         self,
         file_obj: BinaryIO,
@@ -39,15 +70,173 @@ class BasicTransferAdapter:
             self._verify_object(vfy_action, upload_spec["oid"], upload_spec["size"])
 
     def download(
-        self, file_obj: BinaryIO, download_spec: types.DownloadObjectAttributes
+        self,
+        file_obj: BinaryIO,
+        download_spec: types.DownloadObjectAttributes,
+        on_progress: Optional[Callable[[int], None]] = None,
     ) -> None:
         """Download an object from LFS"""
         dl_action = download_spec["actions"]["download"]
-        with requests.get(
-            dl_action["href"], headers=dl_action.get("header", {}), stream=True
+        size = download_spec.get("size") or 0
+        fd = _fileno(file_obj)
+        if fd is not None and self._ranged(dl_action, size):
+            file_obj.flush()
+            self._download_ranges(fd, dl_action, size, on_progress=on_progress)
+            file_obj.seek(size)
+            return
+        self._download_stream(file_obj.write, dl_action, on_progress)
+
+    def download_file(
+        self,
+        path: str,
+        download_spec: types.DownloadObjectAttributes,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        Download an object to `path`. Ranged downloads record their progress in a
+        `<path>.lfs-progress` sidecar file, so that an interrupted download resumes.
+        """
+        dl_action = download_spec["actions"]["download"]
+        size = download_spec.get("size") or 0
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if self._ranged(dl_action, size):
+                progress = _DownloadProgress(
+                    f"{path}.lfs-progress",
+                    download_spec.get("oid", ""),
+                    size,
+                    self.download_part_size,
+                )
+                # without the sidecar, the content of the file cannot be trusted.
+                completed = progress.load() if os.fstat(fd).st_size == size else set()
+                if completed:
+                    _log.info(
+                        "Resuming download of %s, %d parts done", path, len(completed)
+                    )
+                self._download_ranges(
+                    fd, dl_action, size, completed, progress, on_progress
+                )
+                progress.remove()
+                return
+            os.ftruncate(fd, 0)
+            self._download_stream(
+                lambda chunk: _write_all(fd, chunk), dl_action, on_progress
+            )
+        finally:
+            os.close(fd)
+
+    def _ranged(self, dl_action: types.BasicActionAttributes, size: int) -> bool:
+        """Whether to download in ranges: the object is large and the server serves ranges."""
+        if size < 2 * self.download_part_size:
+            return False
+        with self._session().get(
+            dl_action["href"],
+            headers={**(dl_action.get("header") or {}), "Range": "bytes=0-0"},
+            stream=True,
         ) as response:
-            for chunk in response.iter_content(1024 * 16):
-                file_obj.write(chunk)
+            if response.status_code == 206:
+                return True
+        _log.info("Server does not serve ranges, downloading in a single stream")
+        return False
+
+    def _download_stream(
+        self,
+        write: Callable[[bytes], Any],
+        dl_action: types.BasicActionAttributes,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        with self._session().get(
+            dl_action["href"], headers=dl_action.get("header") or {}, stream=True
+        ) as response:
+            if response.status_code // 100 != 2:
+                raise RuntimeError(
+                    f"Unexpected reply from server for download: {response.status_code} {response.text}"
+                )
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                write(chunk)
+                if on_progress:
+                    on_progress(len(chunk))
+
+    def _download_ranges(  # pylint: disable=too-many-arguments
+        self,
+        fd: int,
+        dl_action: types.BasicActionAttributes,
+        size: int,
+        completed: Optional[Set[int]] = None,
+        progress: Optional["_DownloadProgress"] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """Fetch the missing parts of the object with a pool of workers, each written at its offset."""
+        completed = completed or set()
+        _preallocate(fd, size)
+        part_size = self.download_part_size
+        parts = [
+            (i, start, min(start + part_size, size) - 1)
+            for i, start in enumerate(range(0, size, part_size))
+            if i not in completed
+        ]
+        if on_progress and completed:
+            on_progress(size - sum(end - start + 1 for _, start, end in parts))
+        write_lock = threading.Lock()
+        progress_lock = threading.Lock()
+
+        def fetch(index: int, start: int, end: int) -> None:
+            pos = start
+            for attempt in range(self.max_retries + 1):
+                try:
+                    with self._session().get(
+                        dl_action["href"],
+                        headers={
+                            **(dl_action.get("header") or {}),
+                            "Range": f"bytes={pos}-{end}",
+                        },
+                        stream=True,
+                    ) as response:
+                        if response.status_code != 206:
+                            raise RuntimeError(
+                                f"Unexpected reply from server for range {pos}-{end}: {response.status_code}"
+                            )
+                        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                            chunk = chunk[: end + 1 - pos]
+                            _write_at(fd, chunk, pos, write_lock)
+                            pos += len(chunk)
+                            if on_progress:
+                                with progress_lock:
+                                    on_progress(len(chunk))
+                    if pos <= end:
+                        raise RuntimeError(f"Range {start}-{end} ended at {pos}")
+                    break
+                except (RuntimeError, requests.RequestException) as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = min(2**attempt, 30) * random.uniform(0.5, 1.5)  # noqa: S311
+                    _log.warning(
+                        "Range download failed at %d (%s), retrying in %.1f seconds",
+                        pos,
+                        e,
+                        delay,
+                    )
+                    time.sleep(delay)
+            if progress is not None:
+                # the part must be on disk before it is recorded as done.
+                os.fsync(fd)
+                progress.mark(index)
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="lfs-download"
+        ) as executor:
+            futures = [executor.submit(fetch, *part) for part in parts]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in done:
+                future.result()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
 
     @staticmethod
     def _verify_object(
@@ -68,6 +257,12 @@ class BasicTransferAdapter:
 
 
 class MultipartTransferAdapter(BasicTransferAdapter):
+    """
+    Uploads the parts of an object in parallel from `max_workers` threads. Parts are
+    streamed from the file, not read into memory. Failed parts are retried
+    `max_retries` times.
+    """
+
     def upload(
         self,
         file_obj: BinaryIO,
@@ -96,13 +291,13 @@ class MultipartTransferAdapter(BasicTransferAdapter):
         completed_parts = []
         part_action = actions.get("part")
         if part_action:
-            all_parts = part_action.get("parts", [])
-            for p, part in enumerate(all_parts):
-                _log.info("Uploading part %d/%d", p + 1, len(all_parts))
-                etag = self._send_part_request(file_obj, **part)
-                if on_progress:
-                    on_progress(part["size"])
-                completed_parts.append({"ETag": etag, "PartNumber": p + 1})
+            try:
+                completed_parts = self._upload_parts(
+                    file_obj, part_action.get("parts", []), on_progress
+                )
+            except Exception:
+                self._abort(actions.get("abort"))
+                raise
 
         commit_action = actions.get("commit")
         if commit_action:
@@ -124,6 +319,70 @@ class MultipartTransferAdapter(BasicTransferAdapter):
         if verify_action:
             self._verify_object(verify_action, upload_spec["oid"], upload_spec["size"])
 
+    def _upload_parts(
+        self,
+        file_obj: BinaryIO,
+        all_parts: List[Dict[str, Any]],
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Upload the parts with a pool of workers. Returns: the parts to commit, in order."""
+        file_lock = threading.Lock()
+        progress_lock = threading.Lock()
+        etags: Dict[int, Optional[str]] = {}
+
+        def upload_part(p: int, part: Dict[str, Any]) -> None:
+            _log.info("Uploading part %d/%d", p + 1, len(all_parts))
+            etags[p + 1] = self._send_part_with_retries(file_obj, file_lock, part)
+            if on_progress:
+                with progress_lock:
+                    on_progress(part["size"])
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="lfs-upload"
+        ) as executor:
+            futures = [
+                executor.submit(upload_part, p, part)
+                for p, part in enumerate(all_parts)
+            ]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in done:
+                future.result()
+        return [
+            {"ETag": etags[number], "PartNumber": number} for number in sorted(etags)
+        ]
+
+    def _send_part_with_retries(
+        self, file_obj: BinaryIO, file_lock: threading.Lock, part: Dict[str, Any]
+    ) -> Optional[str]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._send_part_request(file_obj, file_lock=file_lock, **part)
+            except (RuntimeError, requests.RequestException) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(2**attempt, 30) * random.uniform(0.5, 1.5)  # noqa: S311
+                _log.warning(
+                    "Part upload failed (%s), retrying in %.1f seconds", e, delay
+                )
+                time.sleep(delay)
+        return None
+
+    def _abort(self, abort_action: Optional[Dict[str, Any]]) -> None:
+        if not abort_action:
+            return
+        _log.info("Sending multipart abort action to %s", abort_action["href"])
+        try:
+            self._send_request(
+                abort_action["href"],
+                method=abort_action.get("method", "POST"),
+                headers=abort_action.get("header", {}),
+                body=abort_action.get("body"),
+            )
+        except requests.RequestException:
+            _log.warning("abort action failed", exc_info=True)
+
     def _send_part_request(
         self,
         file_obj: BinaryIO,
@@ -133,19 +392,19 @@ class MultipartTransferAdapter(BasicTransferAdapter):
         size: Optional[int] = None,
         want_digest: Optional[str] = None,
         header: Optional[Dict[str, Any]] = None,
+        file_lock: Optional[threading.Lock] = None,
         **_,
     ):
         """Upload a part"""
-        file_obj.seek(pos)
-        if size:
-            data = file_obj.read(size)
-        else:
-            data = file_obj.read()
+        if not size:
+            with file_lock or threading.Lock():
+                size = file_obj.seek(0, os.SEEK_END) - pos
+        data = _FileWindow(file_obj, pos, size, file_lock or threading.Lock())
 
-        if header is None:
-            header = {}
+        header = dict(header or {})
 
         if want_digest:
+            # headers go before the body: the digest takes a read of the part first.
             digest_headers = calculate_digest_header(data, want_digest)
             header.update(digest_headers)
 
@@ -158,16 +417,16 @@ class MultipartTransferAdapter(BasicTransferAdapter):
             )
         return reply.headers.get("etag")
 
-    @staticmethod
     def _send_request(
+        self,
         url: str,
         method: str,
         headers: Dict[str, str],
-        body: Optional[Union[bytes, str]] = None,
+        body: Optional[Union[bytes, str, BinaryIO]] = None,
         json: Optional[Dict] = None,
     ) -> requests.Response:
         """Send an arbitrary HTTP request"""
-        reply = requests.session().request(
+        reply = self._session().request(
             method=method,
             url=url,
             headers=headers,
@@ -177,13 +436,147 @@ class MultipartTransferAdapter(BasicTransferAdapter):
         return reply
 
 
-def calculate_digest_header(data: bytes, want_digest: str) -> Dict[str, str]:
-    # type: (bytes, str) -> Dict[str, str]
-    """TODO: Properly implement this"""
+def calculate_digest_header(
+    data: Union[bytes, "_FileWindow"], want_digest: str
+) -> Dict[str, str]:
+    """Digest headers of a body, windows are read in chunks and rewound."""
     if want_digest == "contentMD5":
-        digest = base64.b64encode(hashlib.md5(data).digest()).decode(
-            "ascii"
-        )  # type: str
+        md5 = hashlib.md5()
+        if isinstance(data, _FileWindow):
+            for chunk in iter(lambda: data.read(DOWNLOAD_CHUNK_SIZE), b""):
+                md5.update(chunk)
+            data.seek(0)
+        else:
+            md5.update(data)
+        digest = base64.b64encode(md5.digest()).decode("ascii")  # type: str
         return {"Content-MD5": digest}
     else:
         raise RuntimeError(f"Don't know how to handle want_digest value: {want_digest}")
+
+
+class _FileWindow(io.RawIOBase):
+    """
+    A readable view of `size` bytes of a file from `start`, streamed as a request
+    body. Windows of one file can be read from several threads at once.
+    """
+
+    def __init__(
+        self, file_obj: BinaryIO, start: int, size: int, lock: threading.Lock
+    ) -> None:
+        super().__init__()
+        self._file_obj = file_obj
+        self._fd = _fileno(file_obj) if hasattr(os, "pread") else None
+        self._start = start
+        self._size = size
+        self._pos = 0
+        self._lock = lock
+
+    def __len__(self) -> int:
+        # requests sizes bodies with len() minus tell(), ie. the Content-Length of the part.
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: self._size}
+        self._pos = min(max(base[whence] + offset, 0), self._size)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self._size - self._pos
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        if size <= 0:
+            return b""
+        offset = self._start + self._pos
+        if self._fd is not None:
+            data = os.pread(self._fd, size, offset)
+        else:
+            # the file is shared by the workers, seek and read at once.
+            with self._lock:
+                self._file_obj.seek(offset)
+                data = self._file_obj.read(size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer: Any) -> int:  # noqa: ANN401
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class _DownloadProgress:
+    """Sidecar file recording the downloaded parts of an object."""
+
+    def __init__(self, path: str, oid: str, size: int, part_size: int) -> None:
+        self.path = path
+        self._key = {"oid": oid, "size": size, "part_size": part_size}
+        self._completed: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> Set[int]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if {key: state.get(key) for key in self._key} != self._key:
+            return set()
+        self._completed = set(state.get("completed", []))
+        return set(self._completed)
+
+    def mark(self, index: int) -> None:
+        with self._lock:
+            self._completed.add(index)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({**self._key, "completed": sorted(self._completed)}, f)
+            os.replace(tmp, self.path)
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _fileno(file_obj: BinaryIO) -> Optional[int]:
+    """The descriptor of a real, seekable file, to write ranges at their offsets."""
+    try:
+        return file_obj.fileno() if file_obj.seekable() else None
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _preallocate(fd: int, size: int) -> None:
+    if os.fstat(fd).st_size != size:
+        os.ftruncate(fd, size)
+    if hasattr(os, "posix_fallocate"):
+        try:
+            # reserve the blocks, so that a full disk fails now rather than midway.
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass
+
+
+def _write_at(fd: int, data: bytes, offset: int, lock: threading.Lock) -> None:
+    if hasattr(os, "pwrite"):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+        return
+    with lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        _write_all(fd, data)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    while data:
+        data = data[os.write(fd, data) :]
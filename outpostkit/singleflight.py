@@ -0,0 +1,135 @@
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from outpostkit.cache import canonical_hash
+
+T = TypeVar("T")
+
+SAFE_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+"""Methods whose identical concurrent requests can share a single call."""
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    """Number of calls made through the group."""
+
+    collapsed: int = 0
+    """Number of calls that got the result of an identical call already in flight."""
+
+    @property
+    def collapse_ratio(self) -> float:
+        return self.collapsed / self.calls if self.calls else 0.0
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one: the first caller of a key makes
+    the call and the callers arriving while it is in flight wait for its result, or
+    its exception. Nothing is kept once the call completes.
+
+    `do` serves threads and `ado` serves event loops, calls of different event
+    loops are not collapsed together.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Task[Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = SingleFlightStats()
+
+    @property
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(
+                calls=self._stats.calls, collapsed=self._stats.collapsed
+            )
+
+    @staticmethod
+    def key_for(method: str, url: str, request_kwargs: Dict[str, Any]) -> Optional[str]:
+        """
+        Key of an httpx request, or `None` for requests that cannot be compared,
+        eg. multipart uploads and streamed bodies.
+        """
+        content = request_kwargs.get("content")
+        if "files" in request_kwargs or not isinstance(
+            content, (type(None), str, bytes)
+        ):
+            return None
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        parts = {
+            name: request_kwargs.get(name)
+            for name in ("params", "json", "data", "headers", "cookies")
+            if request_kwargs.get(name) is not None
+        }
+        return canonical_hash(method.upper(), url, parts, content or b"")
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Call `fn`, unless a call with the same key is in flight: share its outcome then."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+            self._count(collapsed=not leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        `do` for coroutines. The call runs as a task, so it completes for the other
+        waiters even if the caller that started it is cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get((loop, key))
+            leader = task is None
+            if task is None:
+                task = loop.create_task(_await(fn))
+                self._tasks[(loop, key)] = task
+                task.add_done_callback(lambda t: self._forget(loop, key, t))
+            self._count(collapsed=not leader)
+        return await asyncio.shield(task)
+
+    def _forget(
+        self, loop: asyncio.AbstractEventLoop, key: str, task: "asyncio.Task[Any]"
+    ) -> None:
+        with self._lock:
+            if self._tasks.get((loop, key)) is task:
+                del self._tasks[(loop, key)]
+        if not task.cancelled():
+            # retrieve the exception, the waiters may all have been cancelled.
+            task.exception()
+
+    def _count(self, *, collapsed: bool) -> None:
+        self._stats.calls += 1
+        if collapsed:
+            self._stats.collapsed += 1
+
+
+async def _await(fn: Callable[[], Awaitable[T]]) -> T:
+    return await fn()
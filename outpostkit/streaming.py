@@ -0,0 +1,102 @@
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+EVENT_STREAM_CONTENT_TYPE = "text/event-stream"
+
+
+@dataclass
+class ServerSentEvent:
+    """A single event of a `text/event-stream` response."""
+
+    data: str = ""
+    event: str = "message"
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+    def json(self) -> Any:  # noqa: ANN401
+        return json.loads(self.data)
+
+
+class SSEDecoder:
+    """
+    Incremental decoder for `text/event-stream` bodies.
+    Feed it the body line by line; it returns an event whenever one is complete.
+    ref: https://html.spec.whatwg.org/multipage/server-sent-events.html#event-stream-interpretation
+    """
+
+    def __init__(self) -> None:
+        self._event = ""
+        self._data: List[str] = []
+        self._id: Optional[str] = None
+        self._last_event_id: Optional[str] = None
+        self._retry: Optional[int] = None
+
+    def decode(self, line: str) -> Optional[ServerSentEvent]:
+        line = line.rstrip("\r\n")
+        if not line:
+            return self._dispatch()
+
+        if line.startswith(":"):  # comment
+            return None
+
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+
+        if name == "event":
+            self._event = value
+        elif name == "data":
+            self._data.append(value)
+        elif name == "id":
+            if "\0" not in value:
+                self._id = value
+        elif name == "retry":
+            if value.isdigit():
+                self._retry = int(value)
+        return None
+
+    def flush(self) -> Optional[ServerSentEvent]:
+        """Dispatch a trailing event not terminated by a blank line."""
+        return self._dispatch()
+
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        if self._id is not None:
+            self._last_event_id = self._id
+        if not self._data and not self._event and self._retry is None:
+            self._id = None
+            return None
+
+        sse = ServerSentEvent(
+            data="\n".join(self._data),
+            event=self._event or "message",
+            id=self._last_event_id,
+            retry=self._retry,
+        )
+        self._event = ""
+        self._data = []
+        self._id = None
+        self._retry = None
+        return sse
+
+
+def iter_sse(lines: Iterator[str]) -> Iterator[ServerSentEvent]:
+    decoder = SSEDecoder()
+    for line in lines:
+        sse = decoder.decode(line)
+        if sse is not None:
+            yield sse
+    sse = decoder.flush()
+    if sse is not None:
+        yield sse
+
+
+async def aiter_sse(lines: AsyncIterator[str]) -> AsyncIterator[ServerSentEvent]:
+    decoder = SSEDecoder()
+    async for line in lines:
+        sse = decoder.decode(line)
+        if sse is not None:
+            yield sse
+    sse = decoder.flush()
+    if sse is not None:
+        yield sse
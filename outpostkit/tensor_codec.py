@@ -0,0 +1,136 @@
+import json
+import struct
+from typing import Any, List, Tuple, Union
+
+from outpostkit.exceptions import OutpostError
+
+try:
+    import numpy as np  # type: ignore
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+TENSOR_CONTENT_TYPE = "application/x-outpost-tensors"
+"""Content type of bodies encoded with `encode_tensors`."""
+
+_MAGIC = b"OPTK"
+_VERSION = 1
+# magic, version, reserved, header length
+_PREAMBLE = struct.Struct("<4sB3xI")
+_ALIGNMENT = 64
+_TENSOR_KEY = "__tensor__"
+
+
+def _pad(length: int) -> int:
+    return -length % _ALIGNMENT
+
+
+def encode_tensors(obj: Any) -> bytes:  # noqa: ANN401
+    """
+    Encode a JSON-like object holding numpy arrays into a binary body.
+
+    The body is a small JSON header describing the structure, followed by the raw,
+    64-byte aligned buffers of the arrays. Arrays are never converted element by element.
+    """
+    buffers: List[memoryview] = []
+    tensors: List[dict] = []
+    offset = 0
+
+    def walk(value: Any) -> Any:  # noqa: ANN401
+        nonlocal offset
+        if isinstance(value, dict):
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [walk(item) for item in value]
+        if HAS_NUMPY:
+            if isinstance(value, np.ndarray):  # type: ignore
+                if value.dtype.hasobject:
+                    raise OutpostError("Arrays of python objects can not be encoded.")
+                # only copies arrays that are not laid out contiguously already.
+                array = (
+                    value if value.flags.c_contiguous else np.ascontiguousarray(value)  # type: ignore
+                )
+                buffer = memoryview(array.reshape(-1).view(np.uint8))  # type: ignore
+                offset += _pad(offset)
+                tensors.append(
+                    {
+                        "dtype": array.dtype.str,
+                        "shape": list(value.shape),
+                        "offset": offset,
+                        "nbytes": buffer.nbytes,
+                    }
+                )
+                buffers.append(buffer)
+                offset += buffer.nbytes
+                return {_TENSOR_KEY: len(tensors) - 1}
+            if isinstance(value, np.integer):  # type: ignore
+                return int(value)
+            if isinstance(value, np.floating):  # type: ignore
+                return float(value)
+            if isinstance(value, np.bool_):  # type: ignore
+                return bool(value)
+        return value
+
+    header = json.dumps(
+        {"payload": walk(obj), "tensors": tensors}, separators=(",", ":")
+    ).encode("utf-8")
+    data_start = _PREAMBLE.size + len(header)
+    parts: List[Union[bytes, memoryview]] = [
+        _PREAMBLE.pack(_MAGIC, _VERSION, len(header)),
+        header,
+        b"\0" * _pad(data_start),
+    ]
+    position = 0
+    for tensor, buffer in zip(tensors, buffers):
+        parts.append(b"\0" * (tensor["offset"] - position))
+        parts.append(buffer)
+        position = tensor["offset"] + tensor["nbytes"]
+    return b"".join(parts)
+
+
+def decode_tensors(body: Union[bytes, bytearray, memoryview]) -> Any:  # noqa: ANN401
+    """
+    Decode a body produced by `encode_tensors`.
+
+    Arrays are read-only views over `body`, no data is copied.
+    """
+    view = memoryview(body)
+    magic, version, header_length = _read_preamble(view)
+    if magic != _MAGIC:
+        raise OutpostError("Not an outpost tensor body.")
+    if version != _VERSION:
+        raise OutpostError(f"Unsupported tensor body version: {version}")
+
+    header_end = _PREAMBLE.size + header_length
+    header = json.loads(bytes(view[_PREAMBLE.size : header_end]))
+    data_start = header_end + _pad(header_end)
+
+    tensors = header["tensors"]
+    if tensors and not HAS_NUMPY:
+        raise OutpostError("numpy is required to decode tensors.")
+
+    def build(spec: dict) -> Any:  # noqa: ANN401
+        start = data_start + spec["offset"]
+        array = np.frombuffer(  # type: ignore
+            view[start : start + spec["nbytes"]],
+            dtype=np.dtype(spec["dtype"]),  # type: ignore
+        )
+        return array.reshape(tuple(spec["shape"]))
+
+    def walk(value: Any) -> Any:  # noqa: ANN401
+        if isinstance(value, dict):
+            if len(value) == 1 and _TENSOR_KEY in value:
+                return build(tensors[value[_TENSOR_KEY]])
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [walk(item) for item in value]
+        return value
+
+    return walk(header["payload"])
+
+
+def _read_preamble(view: memoryview) -> Tuple[bytes, int, int]:
+    if view.nbytes < _PREAMBLE.size:
+        raise OutpostError("Tensor body is too short.")
+    return _PREAMBLE.unpack_from(view)